@@ -0,0 +1,43 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("API_ID", "1")
+os.environ.setdefault("API_HASH", "benchmark")
+os.environ.setdefault("SESSION", "benchmark")
+os.environ.setdefault("STATE_DB", "")
+
+
+@contextmanager
+def timed(label: str, count: int = 1) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<40} {elapsed * 1000:>10.2f} ms total"
+        f" {elapsed * 1000 / count:>10.3f} ms/op"
+    )
@@ -0,0 +1,69 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import time
+import asyncio
+import argparse
+import multiprocessing
+from common import timed
+from typing import Any, Dict
+from concurrent.futures import ProcessPoolExecutor
+
+
+def stub_extract(link: str) -> Dict[str, Any]:
+    time.sleep(0.01)
+    return {"id": link, "url": f"https://example.com/{link}", "title": link}
+
+
+def init_cold(opts: Dict[str, Any]) -> None:
+    from yt_dlp import YoutubeDL
+
+    YoutubeDL(opts)
+
+
+def cold(jobs: int) -> None:
+    from core.extractor import ydl_opts
+
+    for x in range(jobs):
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_cold,
+            initargs=(ydl_opts,),
+        ) as pool:
+            pool.submit(stub_extract, str(x)).result()
+
+
+async def warm(jobs: int) -> None:
+    from core import extractor
+
+    extractor._extract = stub_extract
+    extractor.start_extractor()
+    await extractor.extract_info("warm-up")
+    with timed("warm pool", jobs):
+        await asyncio.gather(*[extractor.extract_info(str(x)) for x in range(jobs)])
+    extractor.stop_extractor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20)
+    args = parser.parse_args()
+    with timed("cold subprocess per job", args.jobs):
+        cold(args.jobs)
+    asyncio.run(warm(args.jobs))
@@ -0,0 +1,48 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import io
+import json
+import argparse
+from common import timed
+from contextlib import redirect_stdout
+
+
+def read_per_command(code: str):
+    with open(f"./lang/{code}.json", "r") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    import lang
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=10000)
+    args = parser.parse_args()
+    codes = lang.languages()
+    lang.MTIMES.clear()
+    with timed("cold reload of all packs", 1), redirect_stdout(io.StringIO()):
+        lang.reload()
+    with timed("reload with no changes", 1):
+        lang.reload()
+    with timed("json file read per command", args.commands):
+        for x in range(args.commands):
+            read_per_command(codes[x % len(codes)])["errorMessage"]
+    with timed("cached lang.load per command", args.commands):
+        for x in range(args.commands):
+            lang.load(codes[x % len(codes)])["errorMessage"]
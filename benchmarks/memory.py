@@ -0,0 +1,77 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import gc
+import argparse
+import tracemalloc
+from common import timed
+from typing import Any, Callable
+
+
+class LegacySong:
+    def __init__(self, link: str, request_msg) -> None:
+        self.title = None
+        self.duration = None
+        self.thumb = None
+        self.remote = None
+        self.source = link
+        self.vid = link[-11:]
+        self.headers = None
+        self.parsed = False
+        self.request_msg = request_msg
+        self.requested_by = request_msg.from_user
+
+
+def make_message(x: int):
+    from pyrogram.enums import ChatType
+    from pyrogram.types import Chat, User, Message
+
+    return Message(
+        id=x,
+        chat=Chat(id=-100123456789, type=ChatType.SUPERGROUP, title="Benchmark"),
+        from_user=User(id=1000 + x, first_name=f"User {x}", username=f"user{x}"),
+        text=f"/play https://www.youtube.com/watch?v={x:011d}",
+    )
+
+
+def measure(label: str, entries: int, factory: Callable[[str, Any], Any]) -> None:
+    from core.queue import Queue
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    queue = Queue()
+    with timed(label, entries):
+        for x in range(entries):
+            song = factory(f"https://www.youtube.com/watch?v={x:011d}", make_message(x))
+            queue.put_nowait(song)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    print(f"{'':<40} {size / 1024:>10.1f} KiB retained {size / entries:>7.0f} B/entry")
+
+
+if __name__ == "__main__":
+    from core.song import Song
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000)
+    args = parser.parse_args()
+    measure("songs holding Message objects", args.entries, LegacySong)
+    measure("slotted songs holding ids", args.entries, Song)
@@ -0,0 +1,139 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import argparse
+from common import timed
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+
+class ListQueue:
+    def __init__(self) -> None:
+        self._items: List[Any] = []
+
+    def put_nowait(self, item, unique: bool = False) -> bool:
+        if unique and self.has_vid(item.vid):
+            return False
+        self._items.append(item)
+        return True
+
+    def get_nowait(self):
+        return self._items.pop(0)
+
+    def remove(self, index: int):
+        return self._items.pop(index)
+
+    def move(self, index: int, to: int) -> None:
+        self._items.insert(to, self._items.pop(index))
+
+    def has_vid(self, vid: Optional[str]) -> bool:
+        return any(item.vid == vid for item in self._items)
+
+    def dedupe(self) -> int:
+        seen = set()
+        items = []
+        for item in self._items:
+            if item.vid not in seen:
+                items.append(item)
+            seen.add(item.vid)
+        removed = len(self._items) - len(items)
+        self._items = items
+        return removed
+
+    def page(self, number: int = 1) -> str:
+        string = ""
+        for x, item in enumerate(self._items[(number - 1) * 10 : number * 10]):
+            string += f"**{x+1}. [{item.title}]({item.source})** \n- Requested By: {item.requester}\n"
+        return string
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+
+def make_item(x: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        vid=f"{x:011d}",
+        title=f"Song {x}",
+        source=f"https://www.youtube.com/watch?v={x:011d}",
+        requester="User",
+    )
+
+
+def put_get(queue, x: int) -> None:
+    queue.put_nowait(queue.get_nowait())
+
+
+def remove_middle(queue, x: int) -> None:
+    queue.put_nowait(queue.remove(len(queue) // 2))
+
+
+def move_middle(queue, x: int) -> None:
+    queue.move(len(queue) // 2, 0)
+
+
+def has_vid(queue, x: int) -> None:
+    queue.has_vid("missing")
+
+
+def dedupe(queue, x: int) -> None:
+    queue.dedupe()
+
+
+def page(queue, x: int) -> None:
+    queue.page(x % 5 + 1)
+
+
+def slice_middle(queue, x: int) -> None:
+    queue[len(queue) // 2 : len(queue) // 2 + 10]
+
+
+OPS = (
+    ("put + get_nowait", put_get),
+    ("remove(middle) + put", remove_middle),
+    ("move(middle, 0)", move_middle),
+    ("has_vid(missing)", has_vid),
+    ("dedupe", dedupe),
+    ("page", page),
+    ("slice(middle, 10)", slice_middle),
+)
+
+
+def run(size: int, repeat: int) -> None:
+    from core.queue import Queue
+
+    for name, op in OPS:
+        count = repeat if name != "dedupe" else max(1, repeat // 100)
+        for kind in (ListQueue, Queue):
+            queue = kind()
+            for x in range(size):
+                queue.put_nowait(make_item(x))
+            with timed(f"{size:>6} {kind.__name__:<9} {name}", count):
+                for x in range(count):
+                    op(queue, x)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat)
@@ -0,0 +1,70 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio
+import argparse
+from aiohttp import web
+from common import timed
+from aiohttp import ClientSession
+from core.http import probe, get_session, close_session
+
+
+async def media(request: web.Request) -> web.Response:
+    if request.method == "HEAD":
+        return web.Response(headers={"Content-Type": "audio/webm"}, body=b"x" * 1024)
+    return web.Response(content_type="audio/webm", body=b"x")
+
+
+async def per_request(url: str, requests: int) -> None:
+    for _ in range(requests):
+        async with ClientSession() as session:
+            async with session.get(url) as response:
+                await response.read()
+
+
+async def shared(url: str, requests: int) -> None:
+    session = get_session()
+    for _ in range(requests):
+        async with session.get(url) as response:
+            await response.read()
+
+
+async def main(requests: int) -> None:
+    app = web.Application()
+    app.router.add_route("*", "/media", media)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/media"
+    with timed("new session per request", requests):
+        await per_request(url, requests)
+    with timed("shared pooled session", requests):
+        await shared(url, requests)
+    with timed("probe (HEAD) on shared session", requests):
+        await asyncio.gather(*[probe(url) for _ in range(requests)])
+    await close_session()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,113 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import time
+import asyncio
+import argparse
+from common import timed
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+
+PAGE = 100
+
+
+class FakeSpotify:
+    def __init__(self, tracks: int, delay: float) -> None:
+        self.tracks = tracks
+        self.delay = delay
+
+    def playlist_items(self, pl_id: str, fields: str, offset: int) -> Dict[str, Any]:
+        time.sleep(self.delay)
+        return {
+            "items": [
+                {"track": {"name": f"Track {x}", "artists": [{"name": "Artist"}]}}
+                for x in range(offset, min(offset + PAGE, self.tracks))
+            ]
+        }
+
+
+def fake_results(tracks: int) -> Dict[str, List[Dict[str, Any]]]:
+    return {
+        f"Artist - Track {x}": [
+            {
+                "type": "video",
+                "title": f"Track {x}",
+                "link": f"https://www.youtube.com/watch?v={x:011d}",
+            }
+        ]
+        for x in range(tracks)
+    }
+
+
+async def sequential(spotify: FakeSpotify, backend) -> int:
+    count = 0
+    offset = 0
+    while True:
+        resp = await asyncio.to_thread(spotify.playlist_items, "x", "", offset)
+        if not resp["items"]:
+            return count
+        offset += len(resp["items"])
+        for item in resp["items"]:
+            track = item["track"]
+            name = f'{",".join([a["name"] for a in track["artists"]])} - {track["name"]}'
+            if await backend.search(name, 1, "en", "US"):
+                count += 1
+
+
+async def pipelined(message) -> int:
+    from core.funcs import get_spotify_playlist
+
+    count = 0
+    async for _ in get_spotify_playlist(
+        "https://open.spotify.com/playlist/benchmark", message
+    ):
+        count += 1
+    return count
+
+
+async def main(tracks: int, page_delay: float, search_delay: float) -> None:
+    from core import funcs
+    from core.provider import provider, StubBackend
+
+    spotify = FakeSpotify(tracks, page_delay)
+    backend = StubBackend(fake_results(tracks), search_delay)
+    funcs.sp = spotify
+    provider.backend = backend
+    provider.cache = None
+    message = SimpleNamespace(
+        id=1,
+        chat=SimpleNamespace(id=-100, title="Benchmark"),
+        from_user=None,
+        sender_chat=None,
+    )
+    with timed("sequential pages and searches", tracks):
+        found = await sequential(spotify, backend)
+    assert found == tracks
+    with timed("pipelined get_spotify_playlist", tracks):
+        found = await pipelined(message)
+    assert found == tracks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tracks", type=int, default=300)
+    parser.add_argument("--page-delay", type=float, default=0.2)
+    parser.add_argument("--search-delay", type=float, default=0.02)
+    args = parser.parse_args()
+    asyncio.run(main(args.tracks, args.page_delay, args.search_delay))
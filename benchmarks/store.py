@@ -0,0 +1,89 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import common
+from typing import Dict, List
+
+
+async def run(commands: int, chats: int, flush_every: int, write_through: bool):
+    from core import groups
+    from core.song import Song
+
+    groups.GROUPS.clear()
+    groups.DIRTY.clear()
+    groups.STORED.clear()
+    groups.SAVED.clear()
+    for x in range(commands):
+        chat_id = -100 - x % chats
+        groups.set_group(chat_id, loop=bool(x % 2))
+        song = Song(f"https://www.youtube.com/watch?v={x:011d}", None)
+        song.title = f"Song {x}"
+        song.chat_id = chat_id
+        await groups.get_queue(chat_id).put(song)
+        if write_through or (x + 1) % flush_every == 0:
+            await groups.flush_groups()
+    await groups.flush_groups()
+
+
+async def main(commands: int, chats: int, flush_every: int, rounds: int) -> None:
+    from core import groups
+    from core.store import SQLiteStore
+
+    modes = [
+        ("store off", False, False),
+        (f"store on, write-behind every {flush_every}", True, False),
+        ("store on, write-through", True, True),
+    ]
+    times: Dict[str, List[float]] = {label: [] for label, _, _ in modes}
+    with tempfile.TemporaryDirectory() as path:
+        for x in range(rounds + 1):
+            for y, (label, stored, write_through) in enumerate(
+                modes[x % 3 :] + modes[: x % 3]
+            ):
+                groups.store = None
+                if stored:
+                    groups.store = SQLiteStore(os.path.join(path, f"{x}-{y}.db"))
+                start = time.perf_counter()
+                await run(commands, chats, flush_every, write_through)
+                if x:
+                    times[label].append(time.perf_counter() - start)
+                if stored:
+                    groups.store.close()
+    groups.store = None
+    for label, elapsed in times.items():
+        elapsed = statistics.median(elapsed)
+        print(
+            f"{label:<40} {elapsed * 1000:>10.2f} ms median"
+            f" {elapsed * 1000 / commands:>10.3f} ms/op"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=5000)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--flush-every", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.commands, args.chats, args.flush_every, args.rounds))
@@ -29,9 +29,11 @@ class Config:
         self.API_HASH: str = os.environ.get("API_HASH", None)
         self.SESSION: str = os.environ.get("SESSION", None)
         self.BOT_TOKEN: str = os.environ.get("BOT_TOKEN", None)
-        self.SUDOERS: list = [
+        sudoers = [
             int(id) for id in os.environ.get("SUDOERS", " ").split() if id.isnumeric()
         ]
+        self.SUDOERS: set = set(sudoers)
+        self.OWNER_ID: int = sudoers[0] if sudoers else None
         if not self.SESSION or not self.API_ID or not self.API_HASH:
             print("ERROR: SESSION, API_ID and API_HASH is required!")
             quit(0)
@@ -47,6 +49,24 @@ class Config:
         self.ADMINS_ONLY: bool = os.environ.get("ADMINS_ONLY", False)
         self.SPOTIFY_CLIENT_ID: str = os.environ.get("SPOTIFY_CLIENT_ID", None)
         self.SPOTIFY_CLIENT_SECRET: str = os.environ.get("SPOTIFY_CLIENT_SECRET", None)
+        self.EXTRACT_WORKERS: int = int(os.environ.get("EXTRACT_WORKERS", 2))
+        self.EXTRACT_TIMEOUT: int = int(os.environ.get("EXTRACT_TIMEOUT", 30))
+        self.EXTRACT_CONCURRENCY: int = int(os.environ.get("EXTRACT_CONCURRENCY", 4))
+        self.CACHE_SIZE: int = int(os.environ.get("CACHE_SIZE", 2000))
+        self.CACHE_MEMORY: int = int(os.environ.get("CACHE_MEMORY", 16))
+        self.CACHE_DB: str = os.environ.get("CACHE_DB", None)
+        self.PREFETCH_COUNT: int = int(os.environ.get("PREFETCH_COUNT", 2))
+        self.COVER_CACHE: int = int(os.environ.get("COVER_CACHE", 50))
+        self.COVER_WORKERS: int = int(os.environ.get("COVER_WORKERS", 2))
+        self.SEARCH_TIMEOUT: int = int(os.environ.get("SEARCH_TIMEOUT", 10))
+        self.SEARCH_CACHE_SIZE: int = int(os.environ.get("SEARCH_CACHE_SIZE", 1000))
+        self.SEARCH_CACHE_TTL: int = int(os.environ.get("SEARCH_CACHE_TTL", 3600))
+        self.SEARCH_CONCURRENCY: int = int(os.environ.get("SEARCH_CONCURRENCY", 4))
+        self.PLAYLIST_LIMIT: int = int(os.environ.get("PLAYLIST_LIMIT", 1000))
+        self.STATE_DB: str = os.environ.get("STATE_DB", "musicplayer.db")
+        self.API_RATE: float = float(os.environ.get("API_RATE", 20))
+        self.API_CHAT_RATE: float = float(os.environ.get("API_CHAT_RATE", 1))
+        self.STREAM_BUDGET: int = int(os.environ.get("STREAM_BUDGET", 0))
 
 
 config = Config()
@@ -22,6 +22,7 @@ from core.stream import app, ytdl, safone, pytgcalls, start_stream
 from core.groups import (
     get_group, get_queue, set_group, set_title, all_groups, clear_queue,
     set_default, shuffle_queue)
+from core.cover import generate_cover
 from core.funcs import (
-    search, check_yt_url, extract_args, generate_cover, delete_messages,
+    search, check_yt_url, extract_args, cancel_imports, delete_messages,
     get_spotify_playlist, get_youtube_playlist)
@@ -16,9 +16,22 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 
+import time
+import asyncio
 from config import config
 from pyrogram import enums
-from pyrogram.types import Message
+from core.stats import incr
+from typing import Dict, Set, Tuple
+from pyrogram.types import Chat, Message, ChatMemberUpdated
+
+
+ADMINS_TTL = 10 * 60
+ADMIN_STATUS = [
+    enums.ChatMemberStatus.OWNER,
+    enums.ChatMemberStatus.ADMINISTRATOR,
+]
+ADMINS: Dict[int, Tuple[float, Set[int]]] = {}
+FETCHING: Dict[int, asyncio.Future] = {}
 
 
 async def is_sudo(message: Message):
@@ -30,11 +43,7 @@ async def is_sudo(message: Message):
 
 async def is_admin(message: Message):
     if message.from_user:
-        user = await message.chat.get_member(message.from_user.id)
-        if user.status in [
-            enums.ChatMemberStatus.OWNER,
-            enums.ChatMemberStatus.ADMINISTRATOR,
-        ]:
+        if message.from_user.id in await get_admins(message.chat):
             return True
         elif message.from_user.id in config.SUDOERS:
             return True
@@ -43,3 +52,36 @@ async def is_admin(message: Message):
             return True
     else:
         return False
+
+
+async def get_admins(chat: Chat) -> Set[int]:
+    cached = ADMINS.get(chat.id)
+    if cached is not None and cached[0] > time.time():
+        incr("admin_api_saved")
+        return cached[1]
+    future = FETCHING.get(chat.id)
+    if future is None:
+        future = FETCHING[chat.id] = asyncio.ensure_future(_fetch_admins(chat))
+        future.add_done_callback(lambda _: FETCHING.pop(chat.id, None))
+    else:
+        incr("admin_api_saved")
+    return await asyncio.shield(future)
+
+
+async def _fetch_admins(chat: Chat) -> Set[int]:
+    incr("admin_api_calls")
+    admins = {
+        admin.user.id
+        async for admin in chat.get_members(
+            filter=enums.ChatMembersFilter.ADMINISTRATORS
+        )
+    }
+    ADMINS[chat.id] = (time.time() + ADMINS_TTL, admins)
+    return admins
+
+
+def invalidate_admins(update: ChatMemberUpdated) -> None:
+    for member in [update.old_chat_member, update.new_chat_member]:
+        if member is not None and member.status in ADMIN_STATUS:
+            ADMINS.pop(update.chat.id, None)
+            return
@@ -0,0 +1,107 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import os
+import time
+import asyncio
+from config import config
+from core.quality import ORDER
+from typing import Any, Dict, List, Callable, Optional, Awaitable
+from core.stats import incr, observe, set_stat
+
+
+COSTS: Dict[str, Dict[str, int]] = {
+    "audio": {"high": 1, "medium": 1, "low": 1},
+    "video": {"high": 8, "medium": 4, "low": 2},
+}
+BUDGET = config.STREAM_BUDGET or 4 * (os.cpu_count() or 1)
+ADMIT_TIMEOUT = 60
+ACTIVE: Dict[int, int] = {}
+WAITERS: List[asyncio.Future] = []
+
+
+class AdmissionError(Exception):
+    pass
+
+
+def used() -> int:
+    return sum(ACTIVE.values())
+
+
+def _report() -> None:
+    set_stat("stream_budget", BUDGET)
+    set_stat("stream_budget_used", used())
+    set_stat("stream_budget_utilization", round(used() / BUDGET, 3))
+
+
+def _fit(chat_id: int, mode: str, profile: str) -> Optional[str]:
+    costs = COSTS[mode]
+    candidates = ORDER[ORDER.index(profile) :] if mode == "video" else [profile]
+    for name in candidates:
+        if used() + costs[name] <= BUDGET or not ACTIVE:
+            ACTIVE[chat_id] = costs[name]
+            if name != profile:
+                incr("admissions_downgraded")
+            _report()
+            return name
+    return None
+
+
+async def admit(
+    chat_id: int,
+    mode: str,
+    profile: str,
+    queued: Optional[Callable[[], Awaitable[Any]]] = None,
+) -> str:
+    ACTIVE.pop(chat_id, None)
+    name = _fit(chat_id, mode, profile)
+    if name is not None:
+        return name
+    incr("admissions_queued")
+    if queued is not None:
+        await queued()
+    started = time.monotonic()
+    deadline = started + ADMIT_TIMEOUT
+    while name is None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            incr("admissions_rejected")
+            _report()
+            raise AdmissionError("STREAM_BUDGET_EXHAUSTED")
+        waiter = asyncio.get_running_loop().create_future()
+        WAITERS.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, remaining)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if waiter in WAITERS:
+                WAITERS.remove(waiter)
+        name = _fit(chat_id, mode, profile)
+    observe("admission_wait", time.monotonic() - started)
+    return name
+
+
+def release(chat_id: int) -> None:
+    if ACTIVE.pop(chat_id, None) is None:
+        return
+    _report()
+    for waiter in WAITERS:
+        if not waiter.done():
+            waiter.set_result(None)
+    WAITERS.clear()
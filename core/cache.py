@@ -0,0 +1,138 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import re
+import json
+import time
+import sqlite3
+from config import config
+from core.stats import incr, set_stat
+from collections import OrderedDict
+from typing import Any, Dict, Tuple, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+YT_REGEX = re.compile(
+    "^((?:https?:)?\\/\\/)?((?:www|m)\\.)?((?:youtube\\.com|youtu.be))(\\/(?:[\\w\\-]+\\?v=|embed\\/|v\\/)?)([\\w\\-]+)([a-zA-Z0-9-_]+)?$"
+)
+DEFAULT_TTL = 3 * 60 * 60
+EXPIRE_MARGIN = 5 * 60
+
+
+def get_video_id(link: str) -> Optional[str]:
+    match = YT_REGEX.match(link)
+    if match is None:
+        return None
+    return match.group(5) + (match.group(6) or "")
+
+
+def get_expiry(remote: str) -> float:
+    try:
+        expire = parse_qs(urlparse(remote).query).get("expire")
+        if expire:
+            return float(expire[0]) - EXPIRE_MARGIN
+    except BaseException:
+        pass
+    return time.time() + DEFAULT_TTL
+
+
+class MetaCache:
+    def __init__(
+        self, max_items: int, max_bytes: int, path: Optional[str] = None
+    ) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS meta "
+                "(vid TEXT PRIMARY KEY, data TEXT, expires REAL)"
+            )
+            self._db.execute("DELETE FROM meta WHERE expires <= ?", (time.time(),))
+            self._db.commit()
+            for vid, data, expires in self._db.execute(
+                "SELECT vid, data, expires FROM meta ORDER BY expires"
+            ):
+                self._store(vid, json.loads(data), expires)
+
+    def get(self, vid: str) -> Optional[Dict[str, Any]]:
+        item = self._items.get(vid)
+        if item is None:
+            incr("cache_misses")
+            return None
+        expires, _, meta = item
+        if expires <= time.time():
+            self.delete(vid)
+            incr("cache_misses")
+            return None
+        self._items.move_to_end(vid)
+        incr("cache_hits")
+        return meta
+
+    def expires(self, vid: str) -> float:
+        item = self._items.get(vid)
+        return item[0] if item is not None else 0
+
+    def set(self, vid: str, meta: Dict[str, Any]) -> float:
+        expires = get_expiry(meta["remote"])
+        self._store(vid, meta, expires)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?, ?)",
+                (vid, json.dumps(meta), expires),
+            )
+            self._db.commit()
+        return expires
+
+    def delete(self, vid: str) -> None:
+        item = self._items.pop(vid, None)
+        if item is not None:
+            self.size -= item[1]
+        if self._db is not None:
+            self._db.execute("DELETE FROM meta WHERE vid = ?", (vid,))
+            self._db.commit()
+
+    def _store(self, vid: str, meta: Dict[str, Any], expires: float) -> None:
+        if vid in self._items:
+            self.size -= self._items.pop(vid)[1]
+        size = len(json.dumps(meta))
+        self._items[vid] = (expires, size, meta)
+        self.size += size
+        while self._items and (
+            len(self._items) > self.max_items or self.size > self.max_bytes
+        ):
+            old, (_, old_size, _) = self._items.popitem(last=False)
+            self.size -= old_size
+            incr("cache_evictions")
+            if self._db is not None:
+                self._db.execute("DELETE FROM meta WHERE vid = ?", (old,))
+                self._db.commit()
+        set_stat("cache_entries", len(self._items))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+cache = MetaCache(
+    config.CACHE_SIZE, config.CACHE_MEMORY * 1024 * 1024, config.CACHE_DB
+)
@@ -0,0 +1,113 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import time
+import heapq
+import asyncio
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from core.stats import incr, set_stat
+from typing import Dict, List, Tuple, Optional
+from itertools import count
+
+
+DELETE_DELAY = 10
+DELETE_BATCH = 100
+DELETE_GRACE = 1
+PENDING: List[Tuple[float, int, Client, int, int]] = []
+SEQUENCE = count()
+WAKEUP: Optional[asyncio.Event] = None
+WORKER: Optional[asyncio.Task] = None
+
+
+def _push(client: Client, chat_id: int, msg_ids: List[int], delay: float) -> None:
+    due = time.monotonic() + delay
+    for msg_id in msg_ids:
+        heapq.heappush(PENDING, (due, next(SEQUENCE), client, chat_id, msg_id))
+    set_stat("deletes_pending", len(PENDING))
+
+
+def schedule_delete(
+    client: Client, chat_id: int, msg_ids: List[int], delay: float = DELETE_DELAY
+) -> None:
+    global WAKEUP, WORKER
+    _push(client, chat_id, msg_ids, delay)
+    incr("deletes_scheduled", len(msg_ids))
+    if WAKEUP is None:
+        WAKEUP = asyncio.Event()
+    if WORKER is None or WORKER.done():
+        WORKER = asyncio.create_task(_worker())
+    WAKEUP.set()
+
+
+def _take(until: float) -> Dict[Tuple[Client, int], List[int]]:
+    batches: Dict[Tuple[Client, int], List[int]] = {}
+    while PENDING and PENDING[0][0] <= until:
+        _, _, client, chat_id, msg_id = heapq.heappop(PENDING)
+        batches.setdefault((client, chat_id), []).append(msg_id)
+    set_stat("deletes_pending", len(PENDING))
+    return batches
+
+
+async def _delete(client: Client, chat_id: int, msg_ids: List[int]) -> None:
+    for x in range(0, len(msg_ids), DELETE_BATCH):
+        batch = msg_ids[x : x + DELETE_BATCH]
+        try:
+            await client.delete_messages(chat_id, batch)
+            incr("delete_calls")
+            incr("deletes_done", len(batch))
+        except FloodWait as e:
+            incr("delete_flood_waits")
+            _push(client, chat_id, msg_ids[x:], e.value + 1)
+            return
+        except Exception:
+            incr("deletes_failed", len(batch))
+
+
+async def _worker() -> None:
+    while True:
+        WAKEUP.clear()
+        if not PENDING:
+            await WAKEUP.wait()
+            continue
+        delay = PENDING[0][0] - time.monotonic()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(WAKEUP.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        batches = _take(time.monotonic() + DELETE_GRACE)
+        await asyncio.gather(
+            *[
+                _delete(client, chat_id, msg_ids)
+                for (client, chat_id), msg_ids in batches.items()
+            ]
+        )
+
+
+async def flush_deletes() -> None:
+    if WORKER is not None:
+        WORKER.cancel()
+    batches = _take(float("inf"))
+    await asyncio.gather(
+        *[
+            _delete(client, chat_id, msg_ids)
+            for (client, chat_id), msg_ids in batches.items()
+        ]
+    )
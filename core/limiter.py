@@ -0,0 +1,202 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import time
+import heapq
+import asyncio
+from config import config
+from pyrogram import Client
+from itertools import count
+from pyrogram.errors import FloodWait
+from core.stats import incr, observe, set_stat
+from pyrogram.raw.functions import phone, upload, updates, channels, messages
+from typing import Any, Dict, List, Tuple, Callable, Optional
+
+
+HIGH = 0
+NORMAL = 1
+LOW = 2
+GLOBAL_BURST = 30
+CHAT_BURST = 5
+FLOOD_RETRIES = 3
+FLOOD_MAX = 5 * 60
+
+PRIORITIES: Dict[type, int] = {
+    phone.CreateGroupCall: HIGH,
+    phone.JoinGroupCall: HIGH,
+    phone.LeaveGroupCall: HIGH,
+    phone.GetGroupCall: HIGH,
+    phone.GetGroupParticipants: HIGH,
+    channels.GetFullChannel: HIGH,
+    phone.EditGroupCallTitle: LOW,
+    messages.SendMedia: LOW,
+    messages.EditMessage: LOW,
+    messages.DeleteMessages: LOW,
+    channels.DeleteMessages: LOW,
+}
+EXEMPT = (
+    upload.SaveFilePart,
+    upload.SaveBigFilePart,
+    upload.GetFile,
+    updates.GetState,
+    updates.GetDifference,
+    updates.GetChannelDifference,
+)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated", "blocked")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked = 0.0
+
+    def wait(self, now: float) -> float:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+        if self.blocked > now:
+            return self.blocked - now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def block(self, until: float) -> None:
+        self.blocked = max(self.blocked, until)
+
+
+class Scheduler:
+    def __init__(self, rate: float, chat_rate: float) -> None:
+        self.bucket = TokenBucket(rate, GLOBAL_BURST)
+        self.chat_rate = chat_rate
+        self.chats: Dict[int, TokenBucket] = {}
+        self.waiters: List[Tuple[int, int, Optional[int], asyncio.Future]] = []
+        self.sequence = count()
+        self.wakeup: Optional[asyncio.Event] = None
+        self.worker: Optional[asyncio.Task] = None
+
+    def _chat(self, key: int) -> TokenBucket:
+        bucket = self.chats.get(key)
+        if bucket is None:
+            bucket = self.chats[key] = TokenBucket(self.chat_rate, CHAT_BURST)
+        return bucket
+
+    async def acquire(self, key: Optional[int], priority: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.sequence), key, future))
+        set_stat("api_queue", len(self.waiters))
+        if self.wakeup is None:
+            self.wakeup = asyncio.Event()
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+        self.wakeup.set()
+        started = time.monotonic()
+        await future
+        observe("api_wait", time.monotonic() - started)
+
+    def block(self, key: Optional[int], seconds: float) -> None:
+        until = time.monotonic() + seconds
+        if key is None:
+            self.bucket.block(until)
+        else:
+            self._chat(key).block(until)
+
+    def _dispatch(self) -> float:
+        now = time.monotonic()
+        delay = float("inf")
+        skipped = []
+        while self.waiters:
+            wait = self.bucket.wait(now)
+            if wait > 0:
+                delay = min(delay, wait)
+                break
+            item = heapq.heappop(self.waiters)
+            _, _, key, future = item
+            if future.done():
+                continue
+            bucket = self._chat(key) if key is not None else None
+            if bucket is not None:
+                wait = bucket.wait(now)
+                if wait > 0:
+                    skipped.append(item)
+                    delay = min(delay, wait)
+                    continue
+                bucket.take()
+            self.bucket.take()
+            future.set_result(None)
+        for item in skipped:
+            heapq.heappush(self.waiters, item)
+        set_stat("api_queue", len(self.waiters))
+        return delay
+
+    async def _run(self) -> None:
+        while True:
+            self.wakeup.clear()
+            delay = self._dispatch()
+            if delay == float("inf"):
+                await self.wakeup.wait()
+                continue
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+def get_key(query: Any) -> Optional[int]:
+    for attr in ["peer", "channel", "call"]:
+        peer = getattr(query, attr, None)
+        if peer is None:
+            continue
+        for name in ["channel_id", "chat_id", "user_id", "id"]:
+            value = getattr(peer, name, None)
+            if value is not None:
+                return value
+    return None
+
+
+def limit(client: Client) -> Client:
+    invoke: Callable = client.invoke
+    scheduler = Scheduler(config.API_RATE, config.API_CHAT_RATE)
+
+    async def limited_invoke(query, *args, **kwargs):
+        if isinstance(query, EXEMPT):
+            return await invoke(query, *args, **kwargs)
+        key = get_key(query)
+        priority = PRIORITIES.get(type(query), NORMAL)
+        if len(args) < 3:
+            kwargs["sleep_threshold"] = 0
+        for attempt in range(FLOOD_RETRIES + 1):
+            await scheduler.acquire(key, priority)
+            incr("api_calls")
+            try:
+                return await invoke(query, *args, **kwargs)
+            except FloodWait as e:
+                incr("api_flood_waits")
+                if attempt == FLOOD_RETRIES or e.value > FLOOD_MAX:
+                    raise
+                scheduler.block(key, e.value)
+
+    client.invoke = limited_invoke
+    return client
@@ -0,0 +1,91 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import time
+import asyncio
+from config import config
+from core.song import Song
+from core.cache import cache
+from typing import Set, Dict, Optional
+from core.groups import get_queue
+
+
+PREFETCH: Dict[int, Dict[Song, asyncio.Task]] = {}
+FAILED: Dict[int, Set[Song]] = {}
+REFRESH_MARGIN = 10 * 60
+
+
+async def _resolve(song: Song) -> bool:
+    while True:
+        if song.parsed and song.expiring(REFRESH_MARGIN):
+            if cache.expires(song.vid) - time.time() <= REFRESH_MARGIN:
+                cache.delete(song.vid)
+            song.parsed = False
+        ok, _ = await song.parse()
+        if not ok or song.vid is None:
+            return ok
+        await asyncio.sleep(max(song.expires - REFRESH_MARGIN - time.time(), 60))
+
+
+def _failed(task: asyncio.Task) -> bool:
+    if not task.done() or task.cancelled():
+        return False
+    return task.exception() is not None or not task.result()
+
+
+def prefetch(chat_id: int) -> None:
+    queue = get_queue(chat_id)
+    tasks = PREFETCH.setdefault(chat_id, {})
+    failed = FAILED.setdefault(chat_id, set())
+    failed.update(song for song, task in tasks.items() if _failed(task))
+    if len(failed) > len(queue):
+        failed.intersection_update(queue)
+    window = []
+    for x in range(len(queue)):
+        if len(window) >= config.PREFETCH_COUNT:
+            break
+        if queue[x] not in failed:
+            window.append(queue[x])
+    for song, task in list(tasks.items()):
+        if song not in window:
+            task.cancel()
+            song.cancel()
+            del tasks[song]
+    for song in window:
+        if song not in tasks:
+            tasks[song] = asyncio.ensure_future(_resolve(song))
+
+
+def cancel_prefetch(chat_id: int) -> None:
+    FAILED.pop(chat_id, None)
+    for song, task in PREFETCH.pop(chat_id, {}).items():
+        task.cancel()
+        song.cancel()
+
+
+def next_song(chat_id: int) -> Optional[Song]:
+    queue = get_queue(chat_id)
+    if len(queue) == 0:
+        return None
+    song = queue.get_nowait()
+    task = PREFETCH.get(chat_id, {}).pop(song, None)
+    if task is not None:
+        task.cancel()
+    FAILED.get(chat_id, set()).discard(song)
+    prefetch(chat_id)
+    return song
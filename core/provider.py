@@ -0,0 +1,150 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import time
+import asyncio
+import unicodedata
+from config import config
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from core.stats import incr, set_stat
+from typing import Any, Dict, List, Tuple, Optional
+from youtubesearchpython.__future__ import VideosSearch
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class SearchBackend(ABC):
+    @abstractmethod
+    async def search(
+        self, query: str, limit: int, language: str, region: str
+    ) -> List[Dict[str, Any]]:
+        pass
+
+
+class YoutubeBackend(SearchBackend):
+    async def search(
+        self, query: str, limit: int, language: str, region: str
+    ) -> List[Dict[str, Any]]:
+        vs = VideosSearch(query, limit=limit, language=language, region=region)
+        result = await vs.next()
+        return result["result"]
+
+
+class StubBackend(SearchBackend):
+    def __init__(
+        self,
+        results: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        delay: float = 0,
+    ) -> None:
+        self.results = results or {}
+        self.delay = delay
+        self.calls = 0
+
+    async def search(
+        self, query: str, limit: int, language: str, region: str
+    ) -> List[Dict[str, Any]]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.results.get(query, [])[:limit]
+
+
+class SearchCache:
+    def __init__(self, max_items: int, ttl: float, negative_ttl: float) -> None:
+        self.max_items = max_items
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Tuple, Tuple[float, List[Dict[str, Any]]]]" = (
+            OrderedDict()
+        )
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        item = self._items.get(key)
+        if item is not None and item[0] <= time.time():
+            del self._items[key]
+            item = None
+        if item is None:
+            self.misses += 1
+            incr("search_cache_misses")
+        else:
+            self._items.move_to_end(key)
+            self.hits += 1
+            incr("search_cache_hits")
+        set_stat(
+            "search_cache_hit_rate", round(self.hits / (self.hits + self.misses), 3)
+        )
+        return None if item is None else item[1]
+
+    def set(self, key: Tuple, results: List[Dict[str, Any]]) -> None:
+        ttl = self.ttl if results else self.negative_ttl
+        self._items[key] = (time.time() + ttl, results)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+
+class SearchProvider:
+    def __init__(
+        self,
+        backend: SearchBackend,
+        timeout: float,
+        cache: Optional[SearchCache] = None,
+    ) -> None:
+        self.backend = backend
+        self.timeout = timeout
+        self.cache = cache
+        self._inflight: Dict[Tuple[str, int, str, str], asyncio.Future] = {}
+
+    async def search(
+        self, query: str, limit: int = 1, language: str = "en", region: str = "US"
+    ) -> List[Dict[str, Any]]:
+        key = (normalize_query(query), limit, language, region)
+        if self.cache is not None:
+            results = self.cache.get(key)
+            if results is not None:
+                return results
+        future = self._inflight.get(key)
+        if future is None:
+            incr("search_requests")
+            future = asyncio.ensure_future(
+                asyncio.wait_for(
+                    self.backend.search(query, limit, language, region), self.timeout
+                )
+            )
+            self._inflight[key] = future
+            future.add_done_callback(lambda future: self._done(key, future))
+        else:
+            incr("search_coalesced")
+        return await asyncio.shield(future)
+
+    def _done(self, key: Tuple[str, int, str, str], future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if self.cache is None or future.cancelled() or future.exception():
+            return
+        self.cache.set(key, future.result())
+
+
+provider = SearchProvider(
+    YoutubeBackend(),
+    config.SEARCH_TIMEOUT,
+    SearchCache(config.SEARCH_CACHE_SIZE, config.SEARCH_CACHE_TTL, 60),
+)
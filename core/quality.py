@@ -0,0 +1,96 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import os
+from config import config
+from core.song import Song
+from typing import Dict, Optional, NamedTuple
+from pytgcalls.types.stream import MediaStream
+from pytgcalls.types import AudioQuality, VideoQuality
+
+
+class Profile(NamedTuple):
+    audio: AudioQuality
+    video: VideoQuality
+    height: int
+    bitrate: int
+
+
+PROFILES: Dict[str, Profile] = {
+    "high": Profile(AudioQuality.HIGH, VideoQuality.FHD_1080p, 1080, 2500),
+    "medium": Profile(AudioQuality.MEDIUM, VideoQuality.HD_720p, 720, 1200),
+    "low": Profile(AudioQuality.LOW, VideoQuality.SD_480p, 480, 0),
+}
+ORDER = list(PROFILES)
+LOAD_LIMIT = 0.8
+
+
+def validate(quality: str) -> str:
+    if quality in PROFILES:
+        return quality
+    print("WARNING: Invalid Quality Specified. Defaulting to High!")
+    return ORDER[0]
+
+
+DEFAULT = validate(config.QUALITY)
+
+
+def cpu_load() -> float:
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+def sustainable(name: str, song: Song) -> bool:
+    profile = PROFILES[name]
+    if name == ORDER[-1]:
+        return True
+    if song.height:
+        if song.height < profile.height:
+            return False
+    elif song.bitrate and song.bitrate < profile.bitrate:
+        return False
+    if name == ORDER[0] and cpu_load() > LOAD_LIMIT:
+        return False
+    return True
+
+
+def choose(song: Song, mode: str, requested: Optional[str] = None) -> str:
+    name = requested or DEFAULT
+    if mode == "video":
+        for name in ORDER[ORDER.index(name) :]:
+            if sustainable(name, song):
+                break
+    return name
+
+
+def build(song: Song, mode: str, audio: str, video: str) -> MediaStream:
+    if mode == "video":
+        return MediaStream(
+            song.remote,
+            PROFILES[audio].audio,
+            PROFILES[video].video,
+            headers=song.headers,
+        )
+    return MediaStream(
+        song.remote,
+        PROFILES[audio].audio,
+        video_flags=MediaStream.Flags.IGNORE,
+        headers=song.headers,
+    )
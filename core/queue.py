@@ -16,50 +16,138 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 
+import math
 import random
 import asyncio
+from typing import Any, Dict, List, Iterator, Optional, Tuple
 
 
-class Queue(asyncio.Queue):
+PAGE_SIZE = 10
+
+
+class Queue:
     def __init__(self) -> None:
-        super().__init__()
+        self._items: List[Any] = []
+        self._vids: Dict[str, int] = {}
+        self._not_empty = asyncio.Event()
+        self._pages: Dict[int, Tuple[int, str]] = {}
+        self.version = 0
+
+    def _changed(self) -> None:
+        self.version += 1
+        if self._items:
+            self._not_empty.set()
+        else:
+            self._not_empty.clear()
+
+    def _count(self, item, delta: int) -> None:
+        vid = getattr(item, "vid", None)
+        if not vid:
+            return
+        count = self._vids.get(vid, 0) + delta
+        if count:
+            self._vids[vid] = count
+        else:
+            del self._vids[vid]
+
+    def has_vid(self, vid: Optional[str]) -> bool:
+        return vid in self._vids
+
+    def put_nowait(self, item, unique: bool = False) -> bool:
+        if unique and self.has_vid(getattr(item, "vid", None)):
+            return False
+        self._items.append(item)
+        self._count(item, 1)
+        self._changed()
+        return True
+
+    async def put(self, item, unique: bool = False) -> bool:
+        return self.put_nowait(item, unique)
+
+    def insert_next(self, item) -> None:
+        self._items.insert(0, item)
+        self._count(item, 1)
+        self._changed()
+
+    def get_nowait(self):
+        if not self._items:
+            raise asyncio.QueueEmpty
+        return self.remove(0)
+
+    async def get(self):
+        while not self._items:
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def remove(self, index: int):
+        item = self._items.pop(index)
+        self._count(item, -1)
+        self._changed()
+        return item
+
+    def move(self, index: int, to: int) -> None:
+        item = self._items.pop(index)
+        if to < 0:
+            to += len(self._items) + 1
+        self._items.insert(min(max(to, 0), len(self._items)), item)
+        self._changed()
+
+    def dedupe(self) -> int:
+        seen = set()
+        items = []
+        for item in self._items:
+            vid = getattr(item, "vid", None)
+            if vid and vid in seen:
+                continue
+            seen.add(vid)
+            items.append(item)
+        removed = len(self._items) - len(items)
+        if removed:
+            self._items = items
+            self._vids = dict.fromkeys(self._vids, 1)
+            self._changed()
+        return removed
 
     def clear(self) -> None:
-        self._queue.clear()
-        self._init(0)
+        self._items.clear()
+        self._vids.clear()
+        self._changed()
 
     def shuffle(self) -> "Queue":
-        copy = list(self._queue.copy())
-        copy.sort(key=lambda _: random.randint(0, 999999999))
-        self.clear()
-        self._queue.extend(copy)
-        return self
-
-    def __iter__(self):
-        self.__index = 0
+        random.shuffle(self._items)
+        self._changed()
         return self
 
-    def __next__(self):
-        if self.__index >= len(self):
-            raise StopIteration
+    def slice(self, start: int, stop: int) -> List[Any]:
+        return self._items[max(start, 0) : max(stop, 0)]
 
-        item = self._queue[self.__index]
-        self.__index += 1
-        return item
+    def __iter__(self) -> Iterator[Any]:
+        return iter(tuple(self._items))
 
     def __len__(self):
-        return len(self._queue)
+        return len(self._items)
 
     def __getitem__(self, index):
-        return self._queue[index]
+        return self._items[index]
 
-    def __str__(self):
-        queue = list(self._queue)
+    def pages(self) -> int:
+        return max(1, math.ceil(len(self._items) / PAGE_SIZE))
+
+    def page(self, number: int = 1) -> str:
+        number = min(max(number, 1), self.pages())
+        cached = self._pages.get(number)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        start = (number - 1) * PAGE_SIZE
         string = ""
-        for x, item in enumerate(queue):
-            if x < 10:
-                string += f"**{x+1}. [{item.title}]({item.source})** \n- Requested By: {item.requested_by.mention if item.requested_by else item.request_msg.sender_chat.title}\n"
-            else:
-                string += f"`\n...{len(queue)-10}`"
-                return string
+        for x, item in enumerate(self.slice(start, start + PAGE_SIZE), start):
+            string += f"**{x+1}. [{item.title}]({item.source})** \n- Requested By: {item.requester}\n"
+        if self.pages() > 1:
+            string += f"`\nPage {number}/{self.pages()}`"
+        if len(self._pages) > self.pages():
+            self._pages.clear()
+        self._pages[number] = (self.version, string)
         return string
+
+    def __str__(self):
+        return self.page(1)
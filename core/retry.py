@@ -0,0 +1,169 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import time
+import random
+import asyncio
+from core.stats import incr
+from typing import Any, Dict, List, Tuple, Callable, Optional, Awaitable, NamedTuple
+
+
+NOT_FOUND = "NOT_FOUND"
+GEO_BLOCKED = "GEO_BLOCKED"
+RATE_LIMITED = "RATE_LIMITED"
+TRANSIENT = "TRANSIENT"
+MAX_RETRIES = "MAX_RETRY_LIMIT_REACHED"
+NO_BUDGET = "RETRY_BUDGET_EXHAUSTED"
+
+
+class Policy(NamedTuple):
+    attempts: int
+    base: float
+    cap: float
+    permanent: bool
+
+
+POLICIES: Dict[str, Policy] = {
+    NOT_FOUND: Policy(1, 0, 0, True),
+    GEO_BLOCKED: Policy(1, 0, 0, True),
+    RATE_LIMITED: Policy(4, 2.0, 30.0, False),
+    TRANSIENT: Policy(5, 0.5, 8.0, False),
+}
+FAILED_TTL = 60 * 60
+BUDGET_WINDOW = 60
+GLOBAL_BUDGET = 60
+CHAT_BUDGET = 10
+
+GEO_PHRASES = [
+    "not available in your country",
+    "blocked it in your country",
+    "geo restrict",
+    "geo-restrict",
+]
+NOT_FOUND_PHRASES = [
+    "video unavailable",
+    "private video",
+    "this video has been removed",
+    "this video is no longer available",
+    "this video is unavailable",
+]
+
+FAILED: Dict[str, Tuple[float, str]] = {}
+BUDGETS: Dict[Optional[int], List[float]] = {}
+SWEPT = 0.0
+
+
+class RetryError(Exception):
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+def classify(error: BaseException) -> str:
+    status = getattr(error, "http_status", None) or getattr(error, "status", None)
+    kind = getattr(error, "kind", None)
+    message = str(error).lower()
+    if (
+        status == 429
+        or "http error 429" in message
+        or "too many requests" in message
+        or "rate-limit" in message
+        or "rate limit" in message
+    ):
+        return RATE_LIMITED
+    if kind == "GeoRestrictedError" or any(
+        phrase in message for phrase in GEO_PHRASES
+    ):
+        return GEO_BLOCKED
+    if kind == "UnavailableVideoError" or any(
+        phrase in message for phrase in NOT_FOUND_PHRASES
+    ):
+        return NOT_FOUND
+    return TRANSIENT
+
+
+def _sweep() -> None:
+    global SWEPT
+    now = time.time()
+    if now - SWEPT < BUDGET_WINDOW:
+        return
+    SWEPT = now
+    for key, (expires, _) in list(FAILED.items()):
+        if expires <= now:
+            del FAILED[key]
+    for key, (started, _) in list(BUDGETS.items()):
+        if now - started >= BUDGET_WINDOW:
+            del BUDGETS[key]
+
+
+def _spend(key: Optional[int], limit: int) -> bool:
+    now = time.time()
+    budget = BUDGETS.get(key)
+    if budget is None or now - budget[0] >= BUDGET_WINDOW:
+        budget = BUDGETS[key] = [now, 0]
+    if budget[1] >= limit:
+        return False
+    budget[1] += 1
+    return True
+
+
+def failed(key: Optional[str]) -> Optional[str]:
+    if key is None or key not in FAILED:
+        return None
+    expires, reason = FAILED[key]
+    if expires <= time.time():
+        del FAILED[key]
+        return None
+    return reason
+
+
+async def retry(
+    func: Callable[..., Awaitable[Any]],
+    *args,
+    key: Optional[str] = None,
+    chat_id: Optional[int] = None,
+) -> Any:
+    _sweep()
+    reason = failed(key)
+    if reason is not None:
+        incr("retry_failures_cached")
+        raise RetryError(reason)
+    attempt = 0
+    while True:
+        try:
+            return await func(*args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            kind = classify(error)
+            policy = POLICIES[kind]
+            attempt += 1
+            if policy.permanent:
+                if key is not None:
+                    FAILED[key] = (time.time() + FAILED_TTL, kind)
+                raise RetryError(kind) from error
+            if attempt >= policy.attempts:
+                raise RetryError(MAX_RETRIES) from error
+            if not _spend(None, GLOBAL_BUDGET) or (
+                chat_id is not None and not _spend(chat_id, CHAT_BUDGET)
+            ):
+                incr("retry_budget_exhausted")
+                raise RetryError(NO_BUDGET) from error
+            incr(f"retries_{kind.lower()}")
+            delay = min(policy.cap, policy.base * 2 ** (attempt - 1))
+            await asyncio.sleep(random.uniform(0, delay))
@@ -16,87 +16,195 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 
-import json
+import os
+import time
 import asyncio
-from shlex import quote
-from subprocess import PIPE
 from datetime import timedelta
-from aiohttp import ClientSession
-from pyrogram.types import User, Message
-from typing import Dict, Tuple, Union, Optional
+from core.http import probe
+from core.retry import RetryError, retry
+from core.extractor import extract_info
+from core.cache import cache, get_expiry, get_video_id
+from pyrogram import Client
+from pyrogram.enums import ChatType
+from pyrogram.types import Chat, User, Message
+from typing import Any, Dict, Tuple, Union, Optional
 
 
 class Song:
-    def __init__(self, link: Union[str, dict], request_msg: Message) -> None:
+    __slots__ = (
+        "title",
+        "duration",
+        "thumb",
+        "remote",
+        "source",
+        "vid",
+        "headers",
+        "size",
+        "mime",
+        "height",
+        "bitrate",
+        "parsed",
+        "direct",
+        "expires",
+        "chat_id",
+        "chat_title",
+        "msg_id",
+        "user_id",
+        "user_name",
+        "sender_title",
+        "_task",
+    )
+    client: Optional[Client] = None
+
+    def __init__(
+        self, link: Union[str, dict], request_msg: Optional[Message]
+    ) -> None:
+        self.expires: float = 0
+        self._task: Optional[asyncio.Task] = None
+        self.headers: dict = None
+        self.size: int = None
+        self.mime: str = None
+        self.height: int = None
+        self.bitrate: float = None
         if isinstance(link, str):
             self.title: str = None
             self.duration: str = None
             self.thumb: str = None
             self.remote: str = None
             self.source: str = link
-            self.headers: dict = None
-            self.request_msg: Message = request_msg
-            self.requested_by: User = request_msg.from_user
+            self.vid: str = get_video_id(link)
             self.parsed: bool = False
-            self._retries: int = 0
+            self.direct: bool = False
         elif isinstance(link, dict):
             self.parsed: bool = True
-            self._retries: int = 0
+            self.vid: str = None
+            self.title: str = None
+            self.remote: str = None
             self.duration: str = "N/A"
-            self.headers: dict = None
             self.thumb: str = "https://telegra.ph/file/820cac7cb7b1a025542e2.jpg"
             for key, value in link.items():
                 setattr(self, key, value)
-            self.request_msg: Message = request_msg
-            self.requested_by: User = request_msg.from_user
+            self.direct: bool = self.remote is not None
+        self.chat_id: int = None
+        self.chat_title: str = None
+        self.msg_id: int = None
+        self.user_id: int = None
+        self.user_name: str = None
+        self.sender_title: str = None
+        if request_msg is not None:
+            user = request_msg.from_user
+            self.chat_id = request_msg.chat.id
+            self.chat_title = request_msg.chat.title
+            self.msg_id = request_msg.id
+            self.user_id = user.id if user else None
+            self.user_name = user.first_name if user else None
+            if request_msg.sender_chat:
+                self.sender_title = request_msg.sender_chat.title
+
+    @property
+    def requested_by(self) -> Optional[User]:
+        if self.user_id is None:
+            return None
+        return User(id=self.user_id, first_name=self.user_name, client=self.client)
+
+    @property
+    def request_msg(self) -> Message:
+        return Message(
+            id=self.msg_id,
+            chat=Chat(
+                id=self.chat_id,
+                type=ChatType.SUPERGROUP,
+                title=self.chat_title,
+                client=self.client,
+            ),
+            from_user=self.requested_by,
+            sender_chat=(
+                Chat(
+                    id=self.chat_id,
+                    type=ChatType.SUPERGROUP,
+                    title=self.sender_title,
+                    client=self.client,
+                )
+                if self.sender_title
+                else None
+            ),
+            client=self.client,
+        )
+
+    @property
+    def requester(self) -> str:
+        if self.user_id is not None:
+            return self.requested_by.mention
+        return self.sender_title
 
     async def parse(self) -> Tuple[bool, str]:
-        if self.parsed:
+        if self.parsed and not self.expiring():
             return (True, "ALREADY_PARSED")
-        if self._retries >= 5:
-            return (False, "MAX_RETRY_LIMIT_REACHED")
-        process = await asyncio.create_subprocess_shell(
-            f"yt-dlp --print-json --skip-download -f best {quote(self.source)}",
-            stdout=PIPE,
-            stderr=PIPE,
-        )
-        out, _ = await process.communicate()
-        try:
-            video = json.loads(out.decode())
-        except json.JSONDecodeError:
-            self._retries += 1
-            return await self.parse()
-        check_remote = await self.check_remote_url(video["url"], video["http_headers"])
-        check_thumb = await self.check_remote_url(
-            video["thumbnail"], video["http_headers"]
-        )
-        if check_remote and check_thumb:
-            self.title = self._escape(video["title"])
-            self.duration = str(timedelta(seconds=video["duration"]))
-            self.thumb = video["thumbnail"]
-            self.remote = video["url"]
-            self.headers = video["http_headers"]
-            self.parsed = True
-            return (True, "PARSED")
-        else:
-            self._retries += 1
-            return await self.parse()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._parse())
+        return await asyncio.shield(self._task)
 
-    @staticmethod
-    async def check_remote_url(
-        path: str, headers: Optional[Dict[str, str]] = None
-    ) -> bool:
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def expiring(self, margin: float = 0) -> bool:
+        return self.vid is not None and self.expires - time.time() <= margin
+
+    async def _parse(self) -> Tuple[bool, str]:
+        if self.vid:
+            meta = cache.get(self.vid)
+            if meta is not None:
+                for key, value in meta.items():
+                    setattr(self, key, value)
+                self.expires = get_expiry(self.remote)
+                self.parsed = True
+                return (True, "CACHED")
         try:
-            session = ClientSession()
-            response = await session.get(path, timeout=5, headers=headers)
-            response.close()
-            await session.close()
-            if response.status == 200:
-                return True
-            else:
-                return False
-        except BaseException:
-            return False
+            video, check_remote = await retry(
+                self._resolve,
+                key=self.vid or self.source,
+                chat_id=self.chat_id,
+            )
+        except RetryError as e:
+            return (False, e.reason)
+        self.title = self._escape(video["title"])
+        self.duration = str(timedelta(seconds=video["duration"]))
+        self.thumb = video["thumbnail"]
+        self.remote = video["url"]
+        self.headers = video["http_headers"]
+        self.size = check_remote["size"]
+        self.mime = check_remote["type"]
+        self.height = video.get("height")
+        self.bitrate = video.get("tbr")
+        self.expires = get_expiry(self.remote)
+        self.parsed = True
+        if self.vid:
+            cache.set(
+                self.vid,
+                {
+                    "title": self.title,
+                    "duration": self.duration,
+                    "thumb": self.thumb,
+                    "remote": self.remote,
+                    "headers": self.headers,
+                    "size": self.size,
+                    "mime": self.mime,
+                    "height": self.height,
+                    "bitrate": self.bitrate,
+                },
+            )
+        return (True, "PARSED")
+
+    async def _resolve(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        video = await extract_info(self.source)
+        check_remote, check_thumb = await asyncio.gather(
+            probe(video["url"], video["http_headers"]),
+            probe(video["thumbnail"], video["http_headers"]),
+        )
+        if not check_remote or not check_thumb:
+            raise ConnectionError("Stream or thumbnail URL is not reachable")
+        return video, check_remote
 
     @staticmethod
     def _escape(_title: str) -> str:
@@ -108,3 +216,50 @@ class Song:
 
     def to_dict(self) -> Dict[str, str]:
         return {"title": self.title, "source": self.source}
+
+    def to_state(self) -> Dict[str, Any]:
+        state = {
+            **self.to_dict(),
+            "chat_id": self.chat_id,
+            "chat_title": self.chat_title,
+            "msg_id": self.msg_id,
+            "user_id": self.user_id,
+            "user_name": self.user_name,
+            "sender_title": self.sender_title,
+        }
+        if self.direct:
+            state["remote"] = self.remote
+            state["duration"] = self.duration
+            state["thumb"] = self.thumb
+            state["headers"] = self.headers
+        return state
+
+    @classmethod
+    def from_state(cls, data: Dict[str, Any]) -> Optional["Song"]:
+        remote = data.get("remote")
+        if remote is None:
+            song = cls(data["source"], None)
+        elif "://" in remote or os.path.exists(remote):
+            song = cls(
+                {
+                    "source": data["source"],
+                    "remote": remote,
+                    "duration": data["duration"],
+                    "thumb": data["thumb"],
+                    "headers": data["headers"],
+                },
+                None,
+            )
+        else:
+            return None
+        for key in [
+            "title",
+            "chat_id",
+            "chat_title",
+            "msg_id",
+            "user_id",
+            "user_name",
+            "sender_title",
+        ]:
+            setattr(song, key, data[key])
+        return song
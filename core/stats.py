@@ -0,0 +1,74 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import time
+import asyncio
+from typing import Dict, Union
+
+
+STATS: Dict[str, Union[int, float]] = {}
+STARTED = time.time()
+
+
+def incr(key: str, value: Union[int, float] = 1) -> None:
+    STATS[key] = STATS.get(key, 0) + value
+
+
+def set_stat(key: str, value: Union[int, float]) -> None:
+    STATS[key] = value
+
+
+def observe(key: str, value: float) -> None:
+    incr(f"{key}_count")
+    incr(f"{key}_total", value)
+    STATS[f"{key}_last"] = value
+    STATS[f"{key}_max"] = max(STATS.get(f"{key}_max", 0), value)
+
+
+async def monitor_lag(interval: float = 0.5) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        observe("loop_lag", loop.time() - start - interval)
+
+
+def get_stats() -> Dict[str, Union[int, float]]:
+    return dict(STATS)
+
+
+def uptime() -> float:
+    return time.time() - STARTED
+
+
+def format_stats() -> str:
+    lines = [f"⏱ **Uptime:** `{int(uptime())}s`"]
+    for key, value in sorted(STATS.items()):
+        if key.endswith("_total"):
+            name = key[:-6]
+            count = STATS.get(f"{name}_count", 0)
+            if count:
+                lines.append(f"• **{name}_avg:** `{round(value / count, 3)}`")
+            continue
+        if isinstance(value, float):
+            value = round(value, 3)
+        lines.append(f"• **{key}:** `{value}`")
+        if key.endswith("_saved"):
+            per_hour = round(value * 3600 / max(uptime(), 1), 1)
+            lines.append(f"• **{key}_per_hour:** `{per_hour}`")
+    return "\n".join(lines)
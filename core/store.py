@@ -0,0 +1,69 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+
+class StateStore(ABC):
+    @abstractmethod
+    def chats(self) -> List[int]:
+        pass
+
+    @abstractmethod
+    def load(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def save(self, states: Dict[int, Dict[str, Any]]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStore(StateStore):
+    def __init__(self, path: str) -> None:
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS groups (chat_id INTEGER PRIMARY KEY, data TEXT)"
+        )
+        self._db.commit()
+
+    def chats(self) -> List[int]:
+        return [row[0] for row in self._db.execute("SELECT chat_id FROM groups")]
+
+    def load(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        row = self._db.execute(
+            "SELECT data FROM groups WHERE chat_id = ?", (chat_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, states: Dict[int, Dict[str, Any]]) -> None:
+        self._db.executemany(
+            "INSERT OR REPLACE INTO groups VALUES (?, ?)",
+            [(chat_id, json.dumps(state)) for chat_id, state in states.items()],
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
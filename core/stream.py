@@ -16,150 +16,168 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 
-import os
+import time
+import asyncio
 from config import config
 from core.song import Song
 from pyrogram import Client
 from yt_dlp import YoutubeDL
 from pytgcalls import PyTgCalls
-from core.funcs import generate_cover
-from core.groups import get_group, set_title
+from core.stats import incr, observe
+from typing import Any, Dict, Callable, Optional, Awaitable
+from core.limiter import limit
+from core.quality import DEFAULT, build, choose
+from core.funcs import delete_messages
+from core.admission import AdmissionError, admit, release
+from core.cover import generate_cover
+from core.extractor import ydl_opts
+from core.groups import get_group, set_group, set_title, forget_call
 from pytgcalls.types.stream import MediaStream
 from pyrogram.raw.types import InputPeerChannel
-from pytgcalls.types import AudioQuality, VideoQuality
 from pyrogram.raw.functions.phone import CreateGroupCall
-from pytgcalls.exceptions import NoActiveGroupCall
+from pytgcalls.exceptions import NotInCallError, NoActiveGroupCall
 
 
 safone = {}
-ydl_opts = {
-    "quiet": True,
-    "geo_bypass": True,
-    "nocheckcertificate": True,
-}
-app = Client(
-    "MusicPlayerUB",
-    api_id=config.API_ID,
-    api_hash=config.API_HASH,
-    session_string=config.SESSION,
-    in_memory=True,
+ACTIVE = "active"
+CREATING = "creating"
+CREATE_TIMEOUT = 15
+PLAY_ATTEMPTS = 4
+SESSIONS: Dict[int, str] = {}
+CREATORS: Dict[int, asyncio.Task] = {}
+app = limit(
+    Client(
+        "MusicPlayerUB",
+        api_id=config.API_ID,
+        api_hash=config.API_HASH,
+        session_string=config.SESSION,
+        in_memory=True,
+    )
 )
 ytdl = YoutubeDL(ydl_opts)
 pytgcalls = PyTgCalls(app)
 
 
-async def start_stream(song: Song, lang):
-    chat = song.request_msg.chat
+async def start_stream(song: Song, lang, started: float = None):
+    request_msg = song.request_msg
+    chat = request_msg.chat
+    cold = SESSIONS.get(chat.id) != ACTIVE
+    begin = time.monotonic()
     if safone.get(chat.id) is not None:
         try:
             await safone[chat.id].delete()
         except BaseException:
             pass
-    infomsg = await song.request_msg.reply_text(lang["downloading"])
+    infomsg = await request_msg.reply_text(lang["downloading"])
+
+    async def queued():
+        try:
+            await infomsg.edit_text(lang["streamQueued"])
+        except BaseException:
+            pass
+
     try:
-        await pytgcalls.play(
-            chat.id,
-            get_quality(song),
-        )
-    except (NoActiveGroupCall):
-        peer = await app.resolve_peer(chat.id)
-        await app.invoke(
-            CreateGroupCall(
-                peer=InputPeerChannel(
-                    channel_id=peer.channel_id,
-                    access_hash=peer.access_hash,
-                ),
-                random_id=app.rnd_id() // 9000000000,
-            )
-        )
-        return await start_stream(song, lang)
+        await play(chat.id, await get_quality(song, queued))
+    except AdmissionError:
+        set_group(chat.id, is_playing=False, now_playing=None)
+        end_session(chat.id)
+        try:
+            await pytgcalls.leave_call(chat.id)
+        except (NoActiveGroupCall, NotInCallError):
+            pass
+        try:
+            await infomsg.edit_text(lang["streamRejected"])
+        except BaseException:
+            pass
+        await delete_messages([infomsg])
+        return
+    except BaseException:
+        release(chat.id)
+        await delete_messages([infomsg])
+        raise
+    if cold:
+        observe("cold_start", time.monotonic() - begin)
+    if started is not None:
+        observe("track_gap", time.monotonic() - started)
     await set_title(chat.id, song.title, client=app)
     thumb = await generate_cover(
         song.title,
         chat.title,
         chat.id,
         song.thumb,
+        song.vid,
     )
-    safone[chat.id] = await song.request_msg.reply_photo(
+    safone[chat.id] = await request_msg.reply_photo(
         photo=thumb,
         caption=lang["playing"]
         % (
             song.title,
             song.source,
             song.duration,
-            song.request_msg.chat.id,
-            (
-                song.requested_by.mention
-                if song.requested_by
-                else song.request_msg.sender_chat.title
-            ),
+            song.chat_id,
+            song.requester,
         ),
         quote=False,
     )
     await infomsg.delete()
-    if os.path.exists(thumb):
-        os.remove(thumb)
-
-
-def get_quality(song: Song) -> MediaStream:
-    group = get_group(song.request_msg.chat.id)
-    if group["stream_mode"] == "video":
-        if config.QUALITY.lower() == "high":
-            return MediaStream(
-                song.remote,
-                AudioQuality.HIGH,
-                VideoQuality.FHD_1080p,
-                headers=song.headers,
-            )
-        elif config.QUALITY.lower() == "medium":
-            return MediaStream(
-                song.remote,
-                AudioQuality.MEDIUM,
-                VideoQuality.HD_720p,
-                headers=song.headers,
-            )
-        elif config.QUALITY.lower() == "low":
-            return MediaStream(
-                song.remote,
-                AudioQuality.LOW,
-                VideoQuality.SD_480p,
-                headers=song.headers,
-            )
-        else:
-            print("WARNING: Invalid Quality Specified. Defaulting to High!")
-            return MediaStream(
-                song.remote,
-                AudioQuality.HIGH,
-                VideoQuality.FHD_1080p,
-                headers=song.headers,
-            )
-    else:
-        if config.QUALITY.lower() == "high":
-            return MediaStream(
-                song.remote,
-                AudioQuality.HIGH,
-                video_flags=MediaStream.Flags.IGNORE,
-                headers=song.headers,
-            )
-        elif config.QUALITY.lower() == "medium":
-            return MediaStream(
-                song.remote,
-                AudioQuality.MEDIUM,
-                video_flags=MediaStream.Flags.IGNORE,
-                headers=song.headers,
-            )
-        elif config.QUALITY.lower() == "low":
-            return MediaStream(
-                song.remote,
-                AudioQuality.LOW,
-                video_flags=MediaStream.Flags.IGNORE,
-                headers=song.headers,
-            )
-        else:
-            print("WARNING: Invalid Quality Specified. Defaulting to High!")
-            return MediaStream(
-                song.remote,
-                AudioQuality.HIGH,
-                video_flags=MediaStream.Flags.IGNORE,
-                headers=song.headers,
+
+
+async def play(chat_id: int, stream: MediaStream) -> None:
+    for attempt in range(PLAY_ATTEMPTS):
+        try:
+            await pytgcalls.play(chat_id, stream)
+            SESSIONS[chat_id] = ACTIVE
+            return
+        except NoActiveGroupCall:
+            if attempt == PLAY_ATTEMPTS - 1:
+                SESSIONS.pop(chat_id, None)
+                raise
+            if SESSIONS.get(chat_id) != CREATING or chat_id in CREATORS:
+                await create_call(chat_id)
+            else:
+                await asyncio.sleep(min(0.5 * 2**attempt, 4))
+
+
+async def create_call(chat_id: int) -> None:
+    task = CREATORS.get(chat_id)
+    if task is None:
+        SESSIONS[chat_id] = CREATING
+        task = CREATORS[chat_id] = asyncio.ensure_future(_create_call(chat_id))
+        task.add_done_callback(lambda _: CREATORS.pop(chat_id, None))
+    await asyncio.wait_for(asyncio.shield(task), CREATE_TIMEOUT)
+
+
+async def _create_call(chat_id: int) -> None:
+    try:
+        peer = await app.resolve_peer(chat_id)
+        await app.invoke(
+            CreateGroupCall(
+                peer=InputPeerChannel(
+                    channel_id=peer.channel_id,
+                    access_hash=peer.access_hash,
+                ),
+                random_id=app.rnd_id() // 9000000000,
             )
+        )
+        forget_call(chat_id)
+        incr("calls_created")
+    except BaseException:
+        SESSIONS.pop(chat_id, None)
+        raise
+
+
+def end_session(chat_id: int) -> None:
+    SESSIONS.pop(chat_id, None)
+    release(chat_id)
+
+
+async def get_quality(
+    song: Song, queued: Optional[Callable[[], Awaitable[Any]]] = None
+) -> MediaStream:
+    group = get_group(song.chat_id)
+    mode = group["stream_mode"]
+    audio = group["quality"] or DEFAULT
+    profile = choose(song, mode, audio)
+    group["profile"] = await admit(song.chat_id, mode, profile, queued)
+    incr(f"quality_{mode}_{group['profile']}")
+    return build(song, mode, audio, group["profile"])
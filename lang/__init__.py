@@ -16,8 +16,77 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>
 """
 
+import os
+import re
 import json
+import asyncio
+from types import MappingProxyType
+from typing import Dict, List, Mapping
 
 
-def load(lang):
-    return json.load(open(f"./lang/{lang}.json", "r"))
+DEFAULT = "en"
+LANG_DIR = os.path.dirname(os.path.abspath(__file__))
+LANGS: Dict[str, Mapping[str, str]] = {}
+MTIMES: Dict[str, float] = {}
+PLACEHOLDER = re.compile("%[sd]")
+
+
+def _read(code: str) -> Dict[str, str]:
+    with open(os.path.join(LANG_DIR, f"{code}.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _validate(code: str, pack: Dict[str, str], base: Dict[str, str]) -> None:
+    for key, value in base.items():
+        if key not in pack:
+            print(f"WARNING: Language {code} has no {key}, using {DEFAULT}!")
+        elif PLACEHOLDER.findall(pack[key]) != PLACEHOLDER.findall(value):
+            print(f"WARNING: Language {code} has invalid {key}, using {DEFAULT}!")
+            del pack[key]
+
+
+def reload() -> List[str]:
+    changed = []
+    files = {
+        file[:-5]: os.path.getmtime(os.path.join(LANG_DIR, file))
+        for file in os.listdir(LANG_DIR)
+        if file.endswith(".json")
+    }
+    base = _read(DEFAULT)
+    for code, mtime in files.items():
+        if MTIMES.get(code) == mtime and MTIMES.get(DEFAULT) == files[DEFAULT]:
+            continue
+        try:
+            pack = _read(code)
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Failed to load language {code}: {e}")
+            continue
+        _validate(code, pack, base)
+        LANGS[code] = MappingProxyType({**base, **pack})
+        changed.append(code)
+    for code in list(LANGS):
+        if code not in files:
+            del LANGS[code]
+    MTIMES.clear()
+    MTIMES.update(files)
+    return changed
+
+
+def load(lang: str) -> Mapping[str, str]:
+    return LANGS.get(lang) or LANGS[DEFAULT]
+
+
+def languages() -> List[str]:
+    return sorted(LANGS)
+
+
+async def watch(interval: float = 10) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(reload)
+        except Exception as e:
+            print(f"WARNING: Failed to reload languages: {e}")
+
+
+reload()
@@ -18,24 +18,41 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>
 
 import os
 import json
+import time
 import shutil
+import asyncio
 from config import config
+from traceback import format_exc
 from core.song import Song
-from pyrogram.types import Message
+from lang import watch, languages
+from core.admins import invalidate_admins
+from pyrogram.types import Message, ChatMemberUpdated
 from pytgcalls import filters as fl
-from pyrogram import Client, filters
+from pyrogram import Client, filters, idle
 from pytgcalls.types import Update, ChatUpdate
 from pytgcalls.types.stream import StreamEnded
-from core.decorators import language, register, only_admins, handle_error
+from core.limiter import limit
+from core.http import close_session
+from core.stream import end_session
+from core.quality import DEFAULT, PROFILES
+from core.cleaner import flush_deletes
+from core.groups import forget_call, write_behind, flush_groups, restore_groups
+from core.stats import monitor_lag, format_stats
+from core.extractor import start_extractor, stop_extractor
+from core.prefetch import prefetch, next_song, cancel_prefetch
+from core.decorators import (
+    language, register, bootstrap, only_admins, handle_error, report_error)
 from pytgcalls.exceptions import (
     NotInCallError, NoActiveGroupCall)
 from core import (
     app, ytdl, safone, search, is_sudo, is_admin, get_group, get_queue,
     pytgcalls, set_group, set_title, all_groups, clear_queue, check_yt_url,
-    extract_args, start_stream, shuffle_queue, delete_messages,
+    extract_args, start_stream, shuffle_queue, cancel_imports, delete_messages,
     get_spotify_playlist, get_youtube_playlist)
 
 
+TASKS = set()
+PROGRESS_INTERVAL = 5
 REPO = """
 🤖 **Music Player**
 
@@ -44,12 +61,14 @@ REPO = """
 """
 
 if config.BOT_TOKEN:
-    bot = Client(
-        "MusicPlayer",
-        api_id=config.API_ID,
-        api_hash=config.API_HASH,
-        bot_token=config.BOT_TOKEN,
-        in_memory=True,
+    bot = limit(
+        Client(
+            "MusicPlayer",
+            api_id=config.API_ID,
+            api_hash=config.API_HASH,
+            bot_token=config.BOT_TOKEN,
+            in_memory=True,
+        )
     )
     client = bot
 else:
@@ -108,6 +127,7 @@ async def play_stream(_, message: Message, lang):
     else:
         queue = get_queue(chat_id)
         await queue.put(song)
+        prefetch(chat_id)
         k = await message.reply_text(
             lang["addedToQueue"] % (song.title, song.source, len(queue)),
             disable_web_page_preview=True,
@@ -160,6 +180,7 @@ async def live_stream(_, message: Message, lang):
     else:
         queue = get_queue(chat_id)
         await queue.put(song)
+        prefetch(chat_id)
         k = await message.reply_text(
             lang["addedToQueue"] % (song.title, song.source, len(queue)),
             disable_web_page_preview=True,
@@ -180,19 +201,18 @@ async def skip_track(_, message: Message, lang):
     if group["loop"]:
         await start_stream(group["now_playing"], lang)
     else:
-        queue = get_queue(chat_id)
-        if len(queue) > 0:
-            next_song = await queue.get()
-            if not next_song.parsed:
-                ok, status = await next_song.parse()
-                if not ok:
-                    raise Exception(status)
-            set_group(chat_id, now_playing=next_song)
-            await start_stream(next_song, lang)
+        song = next_song(chat_id)
+        if song is not None:
+            ok, status = await song.parse()
+            if not ok:
+                raise Exception(status)
+            set_group(chat_id, now_playing=song)
+            await start_stream(song, lang)
             await delete_messages([message])
         else:
             set_group(chat_id, is_playing=False, now_playing=None)
             await set_title(message, "")
+            end_session(chat_id)
             try:
                 await pytgcalls.leave_call(chat_id)
                 k = await message.reply_text(lang["queueEmpty"])
@@ -277,6 +297,9 @@ async def leave_vc(_, message: Message, lang):
     set_group(chat_id, is_playing=False, now_playing=None)
     await set_title(message, "")
     clear_queue(chat_id)
+    cancel_imports(chat_id)
+    cancel_prefetch(chat_id)
+    end_session(chat_id)
     try:
         await pytgcalls.leave_call(chat_id)
         k = await message.reply_text(lang["leaveVC"])
@@ -294,8 +317,12 @@ async def leave_vc(_, message: Message, lang):
 async def queue_list(_, message: Message, lang):
     chat_id = message.chat.id
     queue = get_queue(chat_id)
+    page = extract_args(message.text)
     if len(queue) > 0:
-        k = await message.reply_text(str(queue), disable_web_page_preview=True)
+        k = await message.reply_text(
+            queue.page(int(page) if page.isdigit() else 1),
+            disable_web_page_preview=True,
+        )
     else:
         k = await message.reply_text(lang["queueEmpty"])
     await delete_messages([message, k])
@@ -312,6 +339,7 @@ async def shuffle_list(_, message: Message, lang):
     chat_id = message.chat.id
     if len(get_queue(chat_id)) > 0:
         shuffled = shuffle_queue(chat_id)
+        prefetch(chat_id)
         k = await message.reply_text(str(shuffled), disable_web_page_preview=True)
     else:
         k = await message.reply_text(lang["queueEmpty"])
@@ -386,11 +414,7 @@ async def set_lang(_, message: Message, lang):
     chat_id = message.chat.id
     lng = extract_args(message.text)
     if lng != "":
-        langs = [
-            file.replace(".json", "")
-            for file in os.listdir(f"{os.getcwd()}/lang/")
-            if file.endswith(".json")
-        ]
+        langs = languages()
         if lng == "list":
             k = await message.reply_text("\n".join(langs))
         elif lng in langs:
@@ -401,6 +425,28 @@ async def set_lang(_, message: Message, lang):
         await delete_messages([message, k])
 
 
+@client.on_message(
+    filters.command(["quality"], config.PREFIXES) & ~filters.private
+)
+@register
+@language
+@only_admins
+@handle_error
+async def set_quality(_, message: Message, lang):
+    chat_id = message.chat.id
+    quality = extract_args(message.text).lower()
+    if quality != "":
+        if quality == "auto":
+            set_group(chat_id, quality=None)
+            k = await message.reply_text(lang["qualitySet"] % DEFAULT)
+        elif quality in PROFILES:
+            set_group(chat_id, quality=quality)
+            k = await message.reply_text(lang["qualitySet"] % quality)
+        else:
+            k = await message.reply_text(lang["notFound"])
+        await delete_messages([message, k])
+
+
 @client.on_message(
     filters.command(["ep", "export"], config.PREFIXES) & ~filters.private
 )
@@ -461,6 +507,7 @@ async def import_queue(_, message: Message, lang):
     if group["is_playing"]:
         for _song in temp_queue:
             await queue.put(_song)
+        prefetch(chat_id)
     else:
         song = temp_queue[0]
         set_group(chat_id, is_playing=True, now_playing=song)
@@ -470,6 +517,7 @@ async def import_queue(_, message: Message, lang):
         await start_stream(song, lang)
         for _song in temp_queue[1:]:
             await queue.put(_song)
+        prefetch(chat_id)
     k = await message.reply_text(lang["queueImported"] % len(temp_queue))
     await delete_messages([message, k])
 
@@ -513,22 +561,54 @@ async def import_playlist(_, message: Message, lang):
     else:
         k = await message.reply_text(lang["invalidFile"])
         return await delete_messages([message, k])
-    queue = get_queue(chat_id)
+    imported = 0
     if not group["is_playing"]:
-        song = await temp_queue.__anext__()
-        set_group(chat_id, is_playing=True, now_playing=song)
-        ok, status = await song.parse()
-        if not ok:
-            raise Exception(status)
-        await start_stream(song, lang)
-        async for _song in temp_queue:
-            await queue.put(_song)
-        queue.get_nowait()
-    else:
-        async for _song in temp_queue:
-            await queue.put(_song)
-    k = await message.reply_text(lang["queueImported"] % len(group["queue"]))
-    await delete_messages([message, k])
+        try:
+            song = await temp_queue.__anext__()
+        except StopAsyncIteration:
+            k = await message.reply_text(lang["notFound"])
+            return await delete_messages([message, k])
+        try:
+            set_group(chat_id, is_playing=True, now_playing=song)
+            ok, status = await song.parse()
+            if not ok:
+                raise Exception(status)
+            await start_stream(song, lang)
+        except BaseException:
+            await temp_queue.aclose()
+            raise
+        imported = 1
+    k = await message.reply_text(lang["queueImported"] % imported)
+    task = asyncio.create_task(
+        enqueue_playlist(chat_id, temp_queue, imported, message, k, lang)
+    )
+    TASKS.add(task)
+    task.add_done_callback(TASKS.discard)
+
+
+async def enqueue_playlist(chat_id, songs, imported, message, status, lang):
+    queue = get_queue(chat_id)
+    edited = time.monotonic()
+    try:
+        async for song in songs:
+            await queue.put(song)
+            imported += 1
+            if len(queue) == 1 or time.monotonic() - edited >= PROGRESS_INTERVAL:
+                edited = time.monotonic()
+                prefetch(chat_id)
+                try:
+                    await status.edit_text(lang["queueImported"] % imported)
+                except BaseException:
+                    pass
+    except Exception:
+        await report_error(message._client, chat_id, format_exc())
+    finally:
+        prefetch(chat_id)
+        try:
+            await status.edit_text(lang["queueImported"] % imported)
+        except BaseException:
+            pass
+        await delete_messages([message, status])
 
 
 @client.on_message(
@@ -549,10 +629,27 @@ async def update_restart(_, message: Message, lang):
         except (NoActiveGroupCall, NotInCallError):
             pass
     await stats.edit_text(lang["restart"])
+    await flush_groups()
     shutil.rmtree("downloads", ignore_errors=True)
     os.system(f"kill -9 {os.getpid()} && bash startup.sh")
 
 
+@client.on_message(filters.command("stats", config.PREFIXES) & ~filters.bot)
+@language
+@handle_error
+async def show_stats(_, message: Message, lang):
+    check = await is_sudo(message)
+    if not check:
+        k = await message.reply_text(lang["notAllowed"])
+        return await delete_messages([message, k])
+    await message.reply_text(f"📊 **Stats**\n\n{format_stats()}")
+
+
+@client.on_chat_member_updated()
+async def admins_changed(_, update: ChatMemberUpdated):
+    invalidate_admins(update)
+
+
 @pytgcalls.on_update()
 @language
 @handle_error
@@ -560,18 +657,21 @@ async def stream_end(_, update: Update, lang):
     if isinstance(update, StreamEnded):
         chat_id = update.chat_id
         group = get_group(chat_id)
+        started = time.monotonic()
         if group["loop"]:
-            await start_stream(group["now_playing"], lang)
+            song = group["now_playing"]
+            ok, status = await song.parse()
+            if not ok:
+                raise Exception(status)
+            await start_stream(song, lang, started)
         else:
-            queue = get_queue(chat_id)
-            if len(queue) > 0:
-                next_song = await queue.get()
-                if not next_song.parsed:
-                    ok, status = await next_song.parse()
-                    if not ok:
-                        raise Exception(status)
-                set_group(chat_id, now_playing=next_song)
-                await start_stream(next_song, lang)
+            song = next_song(chat_id)
+            if song is not None:
+                ok, status = await song.parse()
+                if not ok:
+                    raise Exception(status)
+                set_group(chat_id, now_playing=song)
+                await start_stream(song, lang, started)
             else:
                 if safone.get(chat_id) is not None:
                     try:
@@ -580,6 +680,7 @@ async def stream_end(_, update: Update, lang):
                         pass
                 await set_title(chat_id, "", client=app)
                 set_group(chat_id, is_playing=False, now_playing=None)
+                end_session(chat_id)
                 try:
                     await pytgcalls.leave_call(chat_id)
                 except (NoActiveGroupCall, NotInCallError):
@@ -590,6 +691,10 @@ async def stream_end(_, update: Update, lang):
 @handle_error
 async def closed_vc(_, update: Update):
     chat_id = update.chat_id
+    forget_call(chat_id)
+    end_session(chat_id)
+    cancel_imports(chat_id)
+    cancel_prefetch(chat_id)
     if chat_id not in all_groups():
         if safone.get(chat_id) is not None:
             try:
@@ -601,5 +706,25 @@ async def closed_vc(_, update: Update):
         clear_queue(chat_id)
 
 
-client.start()
-pytgcalls.run()
+async def main():
+    Song.client = client
+    restore_groups()
+    await client.start()
+    await pytgcalls.start()
+    await bootstrap(app, client)
+    lag_monitor = asyncio.create_task(monitor_lag())
+    state_writer = asyncio.create_task(write_behind())
+    lang_watcher = asyncio.create_task(watch())
+    await idle()
+    lag_monitor.cancel()
+    state_writer.cancel()
+    lang_watcher.cancel()
+    await flush_deletes()
+    await flush_groups()
+    await close_session()
+    stop_extractor()
+
+
+if __name__ == "__main__":
+    start_extractor()
+    asyncio.get_event_loop().run_until_complete(main())
@@ -0,0 +1,210 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import random
+import asyncio
+import pytest
+from lang import load
+from core.song import Song
+from typing import Dict, List
+from types import SimpleNamespace
+from pyrogram.enums import ChatType
+from core import stream, groups, quality, admission
+from core.admission import COSTS
+
+
+LANG = load("en")
+
+
+class FakeMessage:
+    def __init__(self, chat_id: int, text: str) -> None:
+        self.id = random.randint(1, 10**9)
+        self.chat = SimpleNamespace(id=chat_id, type=ChatType.SUPERGROUP)
+        self.texts = [text]
+        self.deleted = False
+
+    async def edit_text(self, text: str) -> "FakeMessage":
+        self.texts.append(text)
+        return self
+
+    async def delete(self) -> None:
+        self.deleted = True
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent: List[FakeMessage] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> FakeMessage:
+        self.sent.append(FakeMessage(chat_id, text))
+        return self.sent[-1]
+
+    async def send_photo(self, chat_id: int, photo, caption: str, **kwargs):
+        return await self.send_message(chat_id, caption)
+
+
+class FakeCalls:
+    def __init__(self) -> None:
+        self.streams: Dict[int, int] = {}
+        self.left: List[int] = []
+        self.peak = 0
+
+    @property
+    def load(self) -> int:
+        return sum(self.streams.values())
+
+    async def play(self, chat_id: int, media) -> None:
+        if media.camera is None:
+            cost = COSTS["audio"]["high"]
+        else:
+            height = media.camera.parameters.height
+            name = next(
+                name for name, profile in quality.PROFILES.items()
+                if profile.height == height
+            )
+            cost = COSTS["video"][name]
+        await asyncio.sleep(0.001 * cost)
+        self.streams[chat_id] = cost
+        self.peak = max(self.peak, self.load)
+
+    async def leave_call(self, chat_id: int) -> None:
+        self.left.append(chat_id)
+        self.streams.pop(chat_id, None)
+        stream.end_session(chat_id)
+
+
+async def noop(*args, **kwargs) -> str:
+    return "cover.png"
+
+
+def make_song(chat_id: int, mode: str = "video") -> Song:
+    groups.set_group(chat_id, stream_mode=mode)
+    song = Song(
+        {
+            "title": "Song",
+            "source": "https://example.com/song.mp4",
+            "remote": "https://example.com/song.mp4",
+        },
+        SimpleNamespace(
+            id=1,
+            chat=SimpleNamespace(id=chat_id, title="Chat"),
+            from_user=None,
+            sender_chat=SimpleNamespace(title="Chat"),
+        ),
+    )
+    song.height = 1080
+    return song
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    fake = FakeCalls()
+    monkeypatch.setattr(admission, "ACTIVE", {})
+    monkeypatch.setattr(admission, "WAITERS", [])
+    monkeypatch.setattr(admission, "BUDGET", 10)
+    monkeypatch.setattr(groups, "GROUPS", {})
+    monkeypatch.setattr(stream, "SESSIONS", {})
+    monkeypatch.setattr(stream, "pytgcalls", fake)
+    monkeypatch.setattr(stream, "set_title", noop)
+    monkeypatch.setattr(stream, "generate_cover", noop)
+    monkeypatch.setattr(stream, "delete_messages", noop)
+    monkeypatch.setattr(quality, "cpu_load", lambda: 0.0)
+    monkeypatch.setattr(Song, "client", FakeBot())
+    fake.patch = monkeypatch
+    return fake
+
+
+def test_video_is_downgraded_to_fit(calls):
+    async def main():
+        await stream.start_stream(make_song(1), LANG)
+        await stream.start_stream(make_song(2), LANG)
+        assert calls.streams == {1: 8, 2: 2}
+        assert groups.get_group(2)["profile"] == "low"
+
+    asyncio.run(main())
+
+
+def test_replaying_same_chat_reuses_its_slot(calls):
+    async def main():
+        await stream.start_stream(make_song(1), LANG)
+        await stream.start_stream(make_song(1), LANG)
+        assert calls.streams == {1: 8}
+        assert admission.used() == 8
+
+    asyncio.run(main())
+
+
+def test_queued_until_release(calls):
+    calls.patch.setattr(admission, "BUDGET", 8)
+
+    async def main():
+        await stream.start_stream(make_song(1), LANG)
+        waiting = asyncio.create_task(stream.start_stream(make_song(2, "audio"), LANG))
+        await asyncio.sleep(0.05)
+        infomsg = Song.client.sent[-1]
+        assert infomsg.texts == [LANG["downloading"], LANG["streamQueued"]]
+        assert not waiting.done()
+        await calls.leave_call(1)
+        await waiting
+        assert calls.streams == {2: 1}
+        assert infomsg.deleted
+
+    asyncio.run(main())
+
+
+def test_rejected_stream_resets_chat(calls):
+    calls.patch.setattr(admission, "BUDGET", 8)
+    calls.patch.setattr(admission, "ADMIT_TIMEOUT", 0.05)
+
+    async def main():
+        await stream.start_stream(make_song(1), LANG)
+        song = make_song(2)
+        groups.set_group(2, is_playing=True, now_playing=song)
+        assert await stream.start_stream(song, LANG) is None
+        infomsg = Song.client.sent[-1]
+        assert infomsg.texts == [
+            LANG["downloading"],
+            LANG["streamQueued"],
+            LANG["streamRejected"],
+        ]
+        assert not groups.get_group(2)["is_playing"]
+        assert groups.get_group(2)["now_playing"] is None
+        assert 2 not in admission.ACTIVE
+        assert 2 not in stream.SESSIONS
+        assert calls.left == [2]
+        assert calls.streams == {1: 8}
+
+    asyncio.run(main())
+
+
+def test_load_never_exceeds_budget(calls):
+    async def viewer(chat_id: int) -> None:
+        for _ in range(5):
+            mode = random.choice(["audio", "video"])
+            await stream.start_stream(make_song(chat_id, mode), LANG)
+            await asyncio.sleep(random.random() * 0.01)
+            await calls.leave_call(chat_id)
+
+    async def main():
+        random.seed(0)
+        await asyncio.gather(*[viewer(chat_id) for chat_id in range(20)])
+        assert 0 < calls.peak <= admission.BUDGET
+        assert calls.load == 0
+        assert admission.ACTIVE == {}
+
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import time
+import asyncio
+import pytest
+from core import limiter
+from config import config
+from pyrogram.errors import FloodWait
+from pyrogram.raw.types import InputChannel, InputGroupCall
+from pyrogram.raw.functions import help, phone, upload, channels
+
+
+class FakeClient:
+    def __init__(self, floods=None) -> None:
+        self.floods = floods or {}
+        self.calls = []
+
+    async def invoke(self, query, *args, **kwargs):
+        key = limiter.get_key(query)
+        self.calls.append((type(query), key, kwargs, time.monotonic()))
+        if self.floods.get(key):
+            self.floods[key] -= 1
+            raise FloodWait(value=self.floods.get(f"{key}_value", 1))
+        return key
+
+
+def full_channel(channel_id: int) -> channels.GetFullChannel:
+    return channels.GetFullChannel(
+        channel=InputChannel(channel_id=channel_id, access_hash=0)
+    )
+
+
+def get_file() -> upload.GetFile:
+    return upload.GetFile(location=None, offset=0, limit=1024)
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    monkeypatch.setattr(config, "API_RATE", 50, raising=False)
+    monkeypatch.setattr(config, "API_CHAT_RATE", 50, raising=False)
+    return monkeypatch
+
+
+def test_flood_wait_blocks_only_its_chat(rates):
+    async def main():
+        client = limiter.limit(FakeClient({5: 1}))
+        started = time.monotonic()
+        flooded = asyncio.create_task(client.invoke(full_channel(5)))
+        await asyncio.sleep(0.05)
+        assert await client.invoke(full_channel(6)) == 6
+        assert time.monotonic() - started < 0.5
+        assert await flooded == 5
+        assert time.monotonic() - started >= 1
+        calls = [call for call in client.calls if call[1] == 5]
+        assert len(calls) == 2
+        assert calls[1][3] - calls[0][3] >= 1
+        assert all(call[2]["sleep_threshold"] == 0 for call in client.calls)
+
+    asyncio.run(main())
+
+
+def test_flood_wait_gives_up(rates):
+    async def main():
+        client = limiter.limit(FakeClient({5: 10, "5_value": 0}))
+        with pytest.raises(FloodWait):
+            await client.invoke(full_channel(5))
+        assert len(client.calls) == limiter.FLOOD_RETRIES + 1
+        client = limiter.limit(FakeClient({5: 1, "5_value": limiter.FLOOD_MAX + 1}))
+        with pytest.raises(FloodWait):
+            await client.invoke(full_channel(5))
+        assert len(client.calls) == 1
+
+    asyncio.run(main())
+
+
+def test_priority_order(rates):
+    rates.setattr(limiter, "GLOBAL_BURST", 1)
+
+    async def main():
+        client = limiter.limit(FakeClient())
+        await client.invoke(help.GetConfig())
+        call = InputGroupCall(id=7, access_hash=0)
+        await asyncio.gather(
+            client.invoke(phone.EditGroupCallTitle(call=call, title="x")),
+            client.invoke(help.GetConfig()),
+            client.invoke(phone.GetGroupCall(call=call, limit=1)),
+        )
+        assert [call[0] for call in client.calls[1:]] == [
+            phone.GetGroupCall,
+            help.GetConfig,
+            phone.EditGroupCallTitle,
+        ]
+
+    asyncio.run(main())
+
+
+def test_exempt_bypasses_scheduler(rates):
+    rates.setattr(limiter, "GLOBAL_BURST", 1)
+    rates.setattr(config, "API_RATE", 0.001)
+
+    async def main():
+        client = limiter.limit(FakeClient())
+        await client.invoke(help.GetConfig())
+        waiting = asyncio.create_task(client.invoke(help.GetConfig()))
+        await asyncio.wait_for(client.invoke(get_file()), 0.5)
+        assert "sleep_threshold" not in client.calls[-1][2]
+        client.floods[None] = 1
+        with pytest.raises(FloodWait):
+            await asyncio.wait_for(client.invoke(get_file()), 0.5)
+        assert not waiting.done()
+        waiting.cancel()
+
+    asyncio.run(main())
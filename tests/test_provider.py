@@ -0,0 +1,74 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio
+import pytest
+from core.provider import StubBackend, SearchCache, SearchBackend, SearchProvider
+
+
+RESULTS = {"Believer": [{"type": "video", "link": "https://youtu.be/7wtfhZwyrcc"}]}
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        SearchBackend()
+
+
+def test_inflight_searches_are_coalesced():
+    async def main():
+        backend = StubBackend(RESULTS, delay=0.05)
+        provider = SearchProvider(backend, timeout=1)
+        results = await asyncio.gather(
+            provider.search("Believer"),
+            provider.search("Believer"),
+            provider.search("  BELIEVER "),
+        )
+        assert backend.calls == 1
+        assert all(result == RESULTS["Believer"] for result in results)
+        assert provider._inflight == {}
+
+    asyncio.run(main())
+
+
+def test_original_query_reaches_backend():
+    async def main():
+        backend = StubBackend({"Straße": [{"type": "video"}]})
+        provider = SearchProvider(backend, timeout=1)
+        assert await provider.search("Straße") == [{"type": "video"}]
+
+    asyncio.run(main())
+
+
+def test_timeout_is_shared_and_cleared():
+    async def main():
+        backend = StubBackend(RESULTS, delay=1)
+        provider = SearchProvider(backend, timeout=0.05, cache=SearchCache(10, 60, 60))
+        for result in await asyncio.gather(
+            provider.search("Believer"),
+            provider.search("Believer"),
+            return_exceptions=True,
+        ):
+            assert isinstance(result, asyncio.TimeoutError)
+        assert backend.calls == 1
+        assert provider._inflight == {}
+        backend.delay = 0
+        assert await provider.search("Believer") == RESULTS["Believer"]
+        assert await provider.search("believer") == RESULTS["Believer"]
+        assert backend.calls == 2
+
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+Music Player, Telegram Voice Chat Bot
+Copyright (c) 2021-present Asm Safone <https://github.com/AsmSafone>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio
+import pytest
+from core.queue import Queue
+from types import SimpleNamespace
+
+
+def make_queue(*vids) -> Queue:
+    queue = Queue()
+    for vid in vids:
+        queue.put_nowait(
+            SimpleNamespace(vid=vid, title=vid, source=vid, requester="User")
+        )
+    return queue
+
+
+def vids(queue: Queue):
+    return [item.vid for item in queue]
+
+
+def test_move():
+    queue = make_queue("a", "b", "c", "d")
+    queue.move(0, -1)
+    assert vids(queue) == ["b", "c", "d", "a"]
+    queue.move(-1, 0)
+    assert vids(queue) == ["a", "b", "c", "d"]
+    queue.move(1, 2)
+    assert vids(queue) == ["a", "c", "b", "d"]
+    queue.move(3, -2)
+    assert vids(queue) == ["a", "c", "d", "b"]
+
+
+def test_remove_and_get_keep_vid_index():
+    queue = make_queue("a", "b", "a")
+    assert queue.remove(1).vid == "b"
+    assert not queue.has_vid("b")
+    assert queue.get_nowait().vid == "a"
+    assert queue.has_vid("a")
+    assert queue.get_nowait().vid == "a"
+    assert not queue.has_vid("a")
+    with pytest.raises(asyncio.QueueEmpty):
+        queue.get_nowait()
+
+
+def test_dedupe():
+    queue = make_queue("a", "b", "a", None, None, "b", "c")
+    assert queue.dedupe() == 2
+    assert vids(queue) == ["a", "b", None, None, "c"]
+    assert queue._vids == {"a": 1, "b": 1, "c": 1}
+    assert not queue.put_nowait(SimpleNamespace(vid="a"), unique=True)
+
+
+def test_slices():
+    queue = make_queue(*[str(x) for x in range(25)])
+    assert vids(queue[::-1])[:2] == ["24", "23"]
+    assert vids(queue[20:])[0] == "20"
+    assert queue.slice(-5, 2) == queue[:2]
+
+
+def test_pages():
+    queue = make_queue(*[str(x) for x in range(25)])
+    assert "**21. [20](20)**" in queue.page(3)
+    assert "Page 3/3" in queue.page(10)
+    version = queue.version
+    queue.remove(0)
+    assert queue.version != version
+    assert "**21. [21](21)**" in queue.page(3)
+
+
+def test_deep_page():
+    queue = make_queue(*[str(x) for x in range(100000)])
+    assert "**99991. [99990](99990)**" in queue.page(10000)